@@ -0,0 +1,239 @@
+"""
+Streaming readers for the scanner outputs in results/.
+
+Every reader yields one Finding per reported issue while holding only the
+current record in memory, so outputs of hundreds of MB can be processed:
+
+    cppcheck    concatenated per-file XML documents (see scan_runner.py),
+                parsed incrementally with XMLPullParser
+    flawfinder  CSV, read row by row
+    semgrep     JSON, the "results" array decoded one object at a time
+                (with ijson if it is installed)
+
+File paths are normalized to forward slashes; CWE lists go through
+normalize_cwe.
+"""
+
+import csv
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import NamedTuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+TOOLS = ["cppcheck", "flawfinder", "semgrep"]
+OUTPUT_EXTENSIONS = {"cppcheck": ".xml", "flawfinder": ".csv", "semgrep": ".json"}
+CHUNK_SIZE = 1 << 16
+
+
+class Finding(NamedTuple):
+    tool: str
+    repo: str
+    file: str
+    line: int
+    cwes: tuple     # normalized CWE IDs, possibly empty
+    rule: str       # cppcheck error id / flawfinder rule / semgrep check id
+    message: str
+
+
+def normalize_cwe(cwe_id):
+    """Return a list of cleaned CWE IDs"""
+    cwe_list = re.split(r'[/!]', str(cwe_id))  # split composites
+    normalized = []
+    for c in cwe_list:
+        c = c.strip()
+        if not c:
+            continue
+        # "CWE-120: Buffer Copy ..." (semgrep metadata) -> "CWE-120"
+        m = re.match(r'CWE-?(\d+)\b', c, re.IGNORECASE)
+        if m:
+            c = f"CWE-{m.group(1)}"
+        # Add CWE- prefix if missing
+        elif c.isdigit():
+            c = f"CWE-{c}"
+        elif not c.upper().startswith("CWE-"):
+            c = c.replace(" ", "")
+            c = "CWE-" + c
+        normalized.append(c.upper())
+    return normalized
+
+
+def _normalize_path(path):
+    return path.replace("\\", "/")
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+# ====== cppcheck ======
+XML_DECL_RE = re.compile(r'<\?xml.*?\?>')
+
+
+def iter_cppcheck(path, repo):
+    """Findings from a cppcheck XML file, which may hold several XML
+    documents one after another (one per scanned file)."""
+    parser = ET.XMLPullParser(events=("start", "end"))
+    # the documents' own declarations are dropped and everything is wrapped
+    # in one root, as extract_cppcheck_cwe did, but line by line
+    parser.feed("<root>")
+    stack = []
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if "<?xml" in line:
+                line = XML_DECL_RE.sub("", line)
+            parser.feed(line)
+            yield from _cppcheck_events(parser, stack, repo)
+    parser.feed("</root>")
+    yield from _cppcheck_events(parser, stack, repo)
+    parser.close()
+
+
+def _cppcheck_events(parser, stack, repo):
+    for event, elem in parser.read_events():
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag != "error":
+            continue
+        loc = elem.find("location")
+        file = loc.get("file") if loc is not None else elem.get("file0", "")
+        cwe = elem.get("cwe")
+        yield Finding(
+            tool="cppcheck", repo=repo, file=_normalize_path(file or ""),
+            line=_int(loc.get("line")) if loc is not None else 0,
+            cwes=tuple(normalize_cwe(cwe)) if cwe else (),
+            rule=elem.get("id", ""), message=elem.get("msg", ""))
+        # detach the finished error so memory stays flat within large documents
+        if stack:
+            stack[-1].remove(elem)
+
+
+# ====== flawfinder ======
+def iter_flawfinder(path, repo):
+    with open(path, newline="", encoding="utf-8", errors="ignore") as f:
+        for row in csv.DictReader(f):
+            cwes = []
+            for single_cwe in (row.get("CWEs") or "").split(","):
+                if single_cwe.strip():
+                    cwes.extend(normalize_cwe(single_cwe))
+            yield Finding(
+                tool="flawfinder", repo=repo, file=_normalize_path(row.get("File") or ""),
+                line=_int(row.get("Line")), cwes=tuple(cwes),
+                rule=row.get("RuleId") or row.get("Name") or "", message=row.get("Warning") or "")
+
+
+# ====== semgrep ======
+def iter_json_array(f, key):
+    """Decode the objects of the top-level array f[key] one at a time."""
+    if ijson is not None:
+        yield from ijson.items(f, f"{key}.item")
+        return
+    buf = _seek_array(f, key)
+    if buf is None:
+        return
+    decoder = json.JSONDecoder()
+    pos = 0
+    eof = False
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # an object cut by the chunk boundary: read on, unless there is nothing left
+            if eof:
+                raise
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield obj
+        pos = end
+
+
+def _seek_array(f, key):
+    """Read f up to the '[' of the top-level member key; returns the unread
+    rest of the current buffer, or None if there is no such array."""
+    buf = ""
+    i = 0
+    depth = 0
+    in_str = escaped = False
+    str_start = 0
+    last_str = member = None
+    while True:
+        if i >= len(buf):
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return None
+            # keep only what an unfinished string still needs
+            keep = str_start if in_str else i
+            buf, i, str_start = buf[keep:] + chunk, i - keep, str_start - keep
+        ch = buf[i]
+        i += 1
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_str = False
+                last_str = buf[str_start:i - 1] if depth == 1 else None
+        elif ch == '"':
+            in_str = True
+            str_start = i
+        elif ch == ":":
+            member = last_str
+        elif ch in "{[":
+            if ch == "[" and depth == 1 and member == key:
+                return buf[i:]
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+        elif ch == ",":
+            member = last_str = None
+
+
+def iter_semgrep(path, repo):
+    with open(path, "r", encoding="utf-8") as f:
+        for result in iter_json_array(f, "results"):
+            extra = result.get("extra", {})
+            cwe = extra.get("cwe") or extra.get("metadata", {}).get("cwe")
+            cwes = []
+            for c in (cwe if isinstance(cwe, list) else [cwe] if cwe else []):
+                cwes.extend(normalize_cwe(c))
+            yield Finding(
+                tool="semgrep", repo=repo, file=_normalize_path(result.get("path", "")),
+                line=_int(result.get("start", {}).get("line")), cwes=tuple(cwes),
+                rule=result.get("check_id", ""), message=extra.get("message", ""))
+
+
+READERS = {"cppcheck": iter_cppcheck, "flawfinder": iter_flawfinder, "semgrep": iter_semgrep}
+
+
+def output_path(results_dir, repo, tool):
+    return os.path.join(results_dir, f"{repo}_{tool}{OUTPUT_EXTENSIONS[tool]}")
+
+
+def iter_findings(results_dir, repos, tools=TOOLS):
+    """Findings of every <repo>_<tool> output in results_dir, streamed in
+    repo/tool order; missing outputs are reported and skipped."""
+    for repo in repos:
+        for tool in tools:
+            path = output_path(results_dir, repo, tool)
+            if not os.path.exists(path):
+                print(f" File not found: {path}")
+                continue
+            yield from READERS[tool](path, repo)
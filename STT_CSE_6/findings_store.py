@@ -0,0 +1,278 @@
+"""
+SQLite store of scanner findings, filled incrementally from results/.
+
+Each ingestion is a run. A raw output file whose content hash has not
+changed since the previous run is not parsed again. Findings are
+deduplicated by a fingerprint of (tool, repo, file, line, rule, message);
+identical reports are kept once, with their number of occurrences. A
+finding that disappears from its tool's output for a repo is marked fixed
+in that run, so runs can be diffed. If the output file itself is missing,
+the tool's open findings for that repo are marked stale instead: nothing
+says they were fixed, but they no longer count as open.
+
+Usage:
+    python findings_store.py ingest repo_1 repo_2 repo_3 --results results
+    python findings_store.py diff            # new / fixed / stale in the latest run
+    python findings_store.py summary         # tool x CWE totals
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+from findings import READERS, TOOLS, output_path
+
+DEFAULT_DB = os.path.join("results", "findings.db")
+BATCH_SIZE = 5000
+MAX_CWES = 64   # CWEs per finding, for ordering by (finding, position)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    repo TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    run_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    tool TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    file TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    rule TEXT NOT NULL,
+    message TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    first_run INTEGER NOT NULL,
+    last_run INTEGER NOT NULL,
+    fixed_run INTEGER,
+    stale_run INTEGER               -- run in which its source output went missing
+);
+CREATE TABLE IF NOT EXISTS finding_cwes (
+    finding_id INTEGER NOT NULL REFERENCES findings(id),
+    cwe TEXT NOT NULL,
+    pos INTEGER NOT NULL,           -- position in the finding's CWE list
+    PRIMARY KEY (finding_id, cwe)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS findings_tool ON findings(tool);
+CREATE INDEX IF NOT EXISTS findings_repo_tool ON findings(repo, tool);
+CREATE INDEX IF NOT EXISTS findings_file ON findings(file, line);
+CREATE INDEX IF NOT EXISTS findings_first_run ON findings(first_run);
+CREATE INDEX IF NOT EXISTS findings_fixed_run ON findings(fixed_run);
+CREATE INDEX IF NOT EXISTS finding_cwes_cwe ON finding_cwes(cwe);
+"""
+
+
+def fingerprint(f):
+    raw = "\0".join([f.tool, f.repo, f.file, str(f.line), f.rule, f.message])
+    return hashlib.sha1(raw.encode("utf-8", "replace")).hexdigest()
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FindingsStore:
+    """Findings database; open findings are those with fixed_run and
+    stale_run NULL."""
+
+    def __init__(self, path=DEFAULT_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(findings)")}
+        if "stale_run" not in columns:
+            # databases created before findings could go stale
+            self.db.execute("ALTER TABLE findings ADD COLUMN stale_run INTEGER")
+        self.db.execute("CREATE INDEX IF NOT EXISTS findings_stale_run ON findings(stale_run)")
+        self.db.execute("PRAGMA journal_mode=WAL")
+
+    def close(self):
+        self.db.close()
+
+    # ====== INGESTION ======
+    def ingest(self, results_dir, repos, tools=TOOLS, label=None, force=False, verbose=True):
+        """Start a run and ingest every <repo>_<tool> output in results_dir.
+        Returns (run_id, {(repo, tool): 'ingested' | 'unchanged' | 'missing'}).
+        The open findings of a missing output are marked stale, and its
+        recorded hash is dropped so that it is parsed again when it returns."""
+        with self.db:
+            run = self.db.execute("INSERT INTO runs (started, label) VALUES (?, ?)",
+                                  (time.time(), label)).lastrowid
+        status = {}
+        for repo in repos:
+            for tool in tools:
+                path = output_path(results_dir, repo, tool)
+                if not os.path.exists(path):
+                    with self.db:
+                        self.db.execute("UPDATE findings SET stale_run = ? WHERE repo = ? AND tool = ? "
+                                        "AND fixed_run IS NULL AND stale_run IS NULL", (run, repo, tool))
+                        self.db.execute("DELETE FROM sources WHERE path = ?", (path,))
+                    status[(repo, tool)] = "missing"
+                    if verbose:
+                        print(f"{repo} {tool}: missing")
+                    continue
+                digest = file_hash(path)
+                row = self.db.execute("SELECT sha256 FROM sources WHERE path = ?", (path,)).fetchone()
+                with self.db:
+                    if row is not None and row[0] == digest and not force:
+                        # same raw output: its open findings are simply still open
+                        self.db.execute("UPDATE findings SET last_run = ? WHERE repo = ? AND tool = ? "
+                                        "AND fixed_run IS NULL", (run, repo, tool))
+                        status[(repo, tool)] = "unchanged"
+                    else:
+                        self._ingest_source(READERS[tool](path, repo), repo, tool, run)
+                        status[(repo, tool)] = "ingested"
+                    self.db.execute("INSERT OR REPLACE INTO sources (path, repo, tool, sha256, run_id) "
+                                    "VALUES (?, ?, ?, ?, ?)", (path, repo, tool, digest, run))
+                if verbose:
+                    print(f"{repo} {tool}: {status[(repo, tool)]}")
+        return run, status
+
+    def _ingest_source(self, records, repo, tool, run):
+        db = self.db
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS staging (fingerprint TEXT, tool TEXT, repo TEXT, "
+                   "file TEXT, line INTEGER, rule TEXT, message TEXT)")
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS staging_cwes (fingerprint TEXT, cwe TEXT, pos INTEGER)")
+        db.execute("DELETE FROM staging")
+        db.execute("DELETE FROM staging_cwes")
+        rows, cwes = [], []
+        for f in records:
+            fp = fingerprint(f)
+            rows.append((fp, f.tool, f.repo, f.file, f.line, f.rule, f.message))
+            cwes.extend((fp, c, k) for k, c in enumerate(f.cwes))
+            if len(rows) >= BATCH_SIZE:
+                self._flush(rows, cwes)
+        self._flush(rows, cwes)
+        # one row per fingerprint, numbered in order of first appearance
+        db.execute("""
+            INSERT INTO findings (fingerprint, tool, repo, file, line, rule, message,
+                                  occurrences, first_run, last_run, fixed_run)
+            SELECT fingerprint, tool, repo, file, line, rule, message, COUNT(*), :run, :run, NULL
+            FROM staging WHERE true GROUP BY fingerprint ORDER BY MIN(rowid)
+            ON CONFLICT(fingerprint) DO UPDATE SET
+                occurrences = excluded.occurrences,
+                last_run = excluded.last_run,
+                first_run = CASE WHEN findings.fixed_run IS NULL THEN findings.first_run
+                                 ELSE excluded.first_run END,
+                fixed_run = NULL,
+                stale_run = NULL
+        """, {"run": run})
+        # a re-reported finding gets the CWE list of its latest report
+        db.execute("""
+            DELETE FROM finding_cwes WHERE finding_id IN
+                (SELECT f.id FROM findings f JOIN staging s ON f.fingerprint = s.fingerprint)
+        """)
+        db.execute("""
+            INSERT OR IGNORE INTO finding_cwes (finding_id, cwe, pos)
+            SELECT f.id, s.cwe, s.pos FROM staging_cwes s JOIN findings f ON f.fingerprint = s.fingerprint
+        """)
+        # whatever this source no longer reports is fixed in this run, stale or not
+        db.execute("UPDATE findings SET fixed_run = ?, stale_run = NULL WHERE repo = ? AND tool = ? "
+                   "AND fixed_run IS NULL AND last_run < ?", (run, repo, tool, run))
+
+    def _flush(self, rows, cwes):
+        self.db.executemany("INSERT INTO staging VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self.db.executemany("INSERT INTO staging_cwes VALUES (?, ?, ?)", cwes)
+        rows.clear()
+        cwes.clear()
+
+    # ====== QUERIES ======
+    def runs(self):
+        return self.db.execute("SELECT id, started, label FROM runs ORDER BY id").fetchall()
+
+    def latest_run(self):
+        row = self.db.execute("SELECT MAX(id) FROM runs").fetchone()
+        return row[0]
+
+    def diff(self, run=None):
+        """{'new': [...], 'fixed': [...], 'stale': [...]} findings of a run
+        (default: latest), as (tool, repo, file, line, rule, cwes) tuples."""
+        run = run or self.latest_run()
+        query = """
+            SELECT f.tool, f.repo, f.file, f.line, f.rule, COALESCE(GROUP_CONCAT(c.cwe), '')
+            FROM findings f LEFT JOIN finding_cwes c ON c.finding_id = f.id
+            WHERE {} = ? GROUP BY f.id ORDER BY f.tool, f.repo, f.file, f.line
+        """
+        return {"new": self.db.execute(query.format("f.first_run"), (run,)).fetchall(),
+                "fixed": self.db.execute(query.format("f.fixed_run"), (run,)).fetchall(),
+                "stale": self.db.execute(query.format("f.stale_run"), (run,)).fetchall()}
+
+    def cwe_counts(self, by=("repo", "tool")):
+        """(*by, cwe, total occurrences) over open findings, each group's CWEs
+        in order of first appearance (the order of consolidated_cwe.csv)."""
+        cols = ", ".join(f"f.{c}" for c in by)
+        return self.db.execute(f"""
+            SELECT {cols}, c.cwe, SUM(f.occurrences)
+            FROM findings f JOIN finding_cwes c ON c.finding_id = f.id
+            WHERE f.fixed_run IS NULL AND f.stale_run IS NULL
+            GROUP BY {cols}, c.cwe ORDER BY {cols}, MIN(f.id * {MAX_CWES} + c.pos)
+        """).fetchall()
+
+    def consolidated_rows(self, repos, tools, top25):
+        """Rows of consolidated_cwe.csv (all_data in the notebook)."""
+        rank = {(r, t): k for k, (r, t) in enumerate((r, t) for r in repos for t in tools)}
+        rows = [row for row in self.cwe_counts(("repo", "tool")) if (row[0], row[1]) in rank]
+        rows.sort(key=lambda row: rank[(row[0], row[1])])  # stable: keeps the CWE order
+        return [{"Project_name": repo, "Tool_name": tool, "CWE_ID": cwe, "Number_of_Findings": count,
+                 "Is_In_CWE_Top_25?": "Yes" if cwe in top25 else "No"}
+                for repo, tool, cwe, count in rows]
+
+    def findings_at(self, file, line=None):
+        """Open findings in a file (optionally at one line), using the file index."""
+        sql = ("SELECT tool, repo, file, line, rule, message FROM findings "
+               "WHERE file = ? AND fixed_run IS NULL AND stale_run IS NULL")
+        args = [file]
+        if line is not None:
+            sql += " AND line = ?"
+            args.append(line)
+        return self.db.execute(sql + " ORDER BY line", args).fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental SQLite store of scanner findings")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_in = sub.add_parser("ingest", help="Ingest <repo>_<tool> outputs as a new run")
+    p_in.add_argument("repos", nargs="+")
+    p_in.add_argument("--results", default="results")
+    p_in.add_argument("--tools", nargs="+", choices=TOOLS, default=TOOLS)
+    p_in.add_argument("--label", default=None)
+    p_in.add_argument("--force", action="store_true", help="Re-parse outputs even if unchanged")
+    p_diff = sub.add_parser("diff", help="New and fixed findings of a run")
+    p_diff.add_argument("--run", type=int, default=None)
+    sub.add_parser("summary", help="Open findings per tool and CWE")
+    sub.add_parser("runs", help="List runs")
+    args = parser.parse_args()
+
+    store = FindingsStore(args.db)
+    if args.cmd == "ingest":
+        run, _ = store.ingest(args.results, args.repos, args.tools, label=args.label, force=args.force)
+        d = store.diff(run)
+        print(f"run {run}: {len(d['new'])} new, {len(d['fixed'])} fixed, {len(d['stale'])} stale")
+    elif args.cmd == "diff":
+        d = store.diff(args.run)
+        for kind in ("new", "fixed", "stale"):
+            print(f"== {kind}: {len(d[kind])}")
+            for tool, repo, file, line, rule, cwes in d[kind]:
+                print(f"{tool}\t{repo}\t{file}:{line}\t{rule}\t{cwes}")
+    elif args.cmd == "summary":
+        for tool, cwe, count in store.cwe_counts(("tool",)):
+            print(f"{tool}\t{cwe}\t{count}")
+    else:
+        for run, started, label in store.runs():
+            print(run, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)), label or "")
+    store.close()
@@ -0,0 +1,251 @@
+"""
+Vectorized overlap between scanners, at CWE and at finding-location level.
+
+Findings are read from the findings store (findings_store.py) into one
+DataFrame row per (finding, CWE). Overlap is computed on tool x item bit
+matrices:
+
+    CWE level       an item is a CWE ID; Jaccard of the tools' CWE sets
+                    (the notebook's tool_iou_matrix.csv)
+    location level  an item is a (repo, file, CWE) location: lines of the
+                    same file and CWE within `window` of each other are
+                    chained into one location; IoU of the tools' locations
+    Top-25          an item is a Top-25 CWE; coverage of every tool and of
+                    every pair of tools used together
+
+Each item's tools are packed into a bit signature (ceil(tools / 8) bytes).
+Items with the same signature are counted once, and all pairwise
+intersections come from one matrix product over the distinct signatures.
+This scales to many tools and repos without per-tool Python loops.
+With by="repo", every matrix is computed per repo in the same pass.
+
+Usage:
+    python overlap.py --db results/findings.db --window 3 --out results
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from findings import TOOLS
+
+DEFAULT_DB = os.path.join("results", "findings.db")
+
+# MITRE CWE Top 25, as in cse_stt.ipynb
+TOP25_CWES = [
+    "CWE-79", "CWE-787", "CWE-89", "CWE-352", "CWE-22",
+    "CWE-125", "CWE-78", "CWE-416", "CWE-862", "CWE-434",
+    "CWE-94", "CWE-20", "CWE-77", "CWE-287", "CWE-269",
+    "CWE-502", "CWE-200", "CWE-863", "CWE-918", "CWE-119",
+    "CWE-476", "CWE-798", "CWE-190", "CWE-400", "CWE-306"
+]
+
+
+# ====== LOADING ======
+def load_findings(store, repos=None, tools=None):
+    """Open findings as a DataFrame with one row per (finding, CWE):
+    tool, repo, file, line, cwe, occurrences."""
+    sql = """
+        SELECT f.tool, f.repo, f.file, f.line, c.cwe, f.occurrences
+        FROM findings f JOIN finding_cwes c ON c.finding_id = f.id
+        WHERE f.fixed_run IS NULL AND f.stale_run IS NULL
+    """
+    args = []
+    for col, values in (("repo", repos), ("tool", tools)):
+        if values:
+            sql += f" AND f.{col} IN ({', '.join('?' * len(values))})"
+            args.extend(values)
+    df = pd.DataFrame(store.db.execute(sql, args).fetchall(),
+                      columns=["tool", "repo", "file", "line", "cwe", "occurrences"])
+    df["file"] = df["file"].str.removeprefix("./")
+    return df
+
+
+def codes(values, labels):
+    """Integer code of each value in labels (-1 if absent)."""
+    return pd.Categorical(values, categories=labels).codes.astype(np.int64)
+
+
+# ====== BIT MATRICES ======
+def signatures(items, tool_codes, n_tools):
+    """Packed tool bitmask of every item: (n_items, ceil(n_tools / 8)) uint8,
+    bit t of row i set if tool t reported item i."""
+    packed = np.zeros((int(items.max()) + 1 if len(items) else 0, (n_tools + 7) // 8), dtype=np.uint8)
+    np.bitwise_or.at(packed, (items, tool_codes >> 3), (1 << (tool_codes & 7)).astype(np.uint8))
+    return packed
+
+
+def pairwise_counts(items, tool_codes, n_tools, groups=None, n_groups=1):
+    """Intersection sizes |A_t & A_u| for every pair of tools, per group:
+    an (n_groups, n_tools, n_tools) int array whose diagonal holds |A_t|.
+
+    items are item ids (each item belongs to one group), tool_codes the tool
+    of each report; repeated (item, tool) reports count once."""
+    inter = np.zeros((n_groups, n_tools, n_tools), dtype=np.int64)
+    keep = tool_codes >= 0   # reports of tools not asked for
+    items, tool_codes = items[keep], tool_codes[keep]
+    if groups is not None:
+        groups = groups[keep]
+    if not len(items):
+        return inter
+    packed = signatures(items, tool_codes, n_tools)
+    item_group = np.zeros(len(packed), dtype=np.int64)
+    if groups is not None:
+        item_group[items] = groups
+    seen = packed.any(axis=1)
+    # distinct signatures (each row viewed as one opaque value), then distinct
+    # (group, signature) pairs and how many items share each
+    sigs, sig_codes = np.unique(packed[seen].view(f"V{packed.shape[1]}").ravel(), return_inverse=True)
+    keys, counts = np.unique(item_group[seen] * len(sigs) + sig_codes, return_counts=True)
+    key_groups, key_sigs = np.divmod(keys, len(sigs))
+    bits = np.unpackbits(sigs.view(np.uint8).reshape(len(sigs), -1), axis=1, bitorder="little")
+    bits = bits[key_sigs, :n_tools].astype(np.int64)
+    if n_groups == 1:
+        inter[0] = bits.T @ (bits * counts[:, None])
+    else:
+        # few distinct signatures per group: accumulate their outer products
+        np.add.at(inter, key_groups, bits[:, :, None] * bits[:, None, :] * counts[:, None, None])
+    return inter
+
+
+def iou(inter):
+    """Intersection over union from pairwise intersection sizes; 0 where
+    both sets are empty."""
+    sizes = np.diagonal(inter, axis1=-2, axis2=-1)
+    union = sizes[..., :, None] + sizes[..., None, :] - inter
+    return np.divide(inter, union, out=np.zeros(inter.shape), where=union > 0)
+
+
+def _frames(matrix, tools, group_labels):
+    """Square DataFrame (no groups) or long DataFrame repo, tool_a, tool_b, value."""
+    if group_labels is None:
+        return pd.DataFrame(matrix[0], index=tools, columns=tools)
+    g, a, b = np.indices(matrix.shape).reshape(3, -1)
+    return pd.DataFrame({"repo": np.asarray(group_labels)[g], "tool_a": np.asarray(tools)[a],
+                         "tool_b": np.asarray(tools)[b], "value": matrix.ravel()})
+
+
+def _groups(df, by):
+    if by is None:
+        return None, 1, None
+    labels = list(pd.unique(df[by]))
+    return codes(df[by], labels), len(labels), labels
+
+
+# ====== OVERLAP MATRICES ======
+def cwe_jaccard(df, tools, by=None):
+    """Jaccard index of the tools' CWE sets."""
+    tool_codes = codes(df["tool"], tools)
+    groups, n_groups, labels = _groups(df, by)
+    # one item per (group, CWE)
+    items = df.groupby([by, "cwe"] if by else ["cwe"], sort=False).ngroup().to_numpy()
+    inter = pairwise_counts(items, tool_codes, len(tools), groups, n_groups)
+    return _frames(iou(inter), tools, labels)
+
+
+def location_ids(df, window=0):
+    """Location id of every row. Rows with the same repo, file and CWE whose
+    lines are at most `window` apart (chained, single linkage) share a location."""
+    key = df.groupby(["repo", "file", "cwe"], sort=False).ngroup().to_numpy()
+    line = df["line"].to_numpy()
+    order = np.lexsort((line, key))
+    k, ln = key[order], line[order]
+    new = np.ones(len(k), dtype=bool)
+    new[1:] = (k[1:] != k[:-1]) | (ln[1:] - ln[:-1] > window)
+    ids = np.empty(len(k), dtype=np.int64)
+    ids[order] = np.cumsum(new) - 1
+    return ids
+
+
+def location_iou(df, tools, window=0, by=None):
+    """IoU of the tools' finding locations (file, line window, CWE)."""
+    groups, n_groups, labels = _groups(df, by)
+    inter = pairwise_counts(location_ids(df, window), codes(df["tool"], tools), len(tools), groups, n_groups)
+    return _frames(iou(inter), tools, labels)
+
+
+def location_counts(df, tools, window=0):
+    """Shared locations |A & B| (diagonal: each tool's locations)."""
+    inter = pairwise_counts(location_ids(df, window), codes(df["tool"], tools), len(tools))
+    return _frames(inter, tools, None)
+
+
+def top25_coverage(df, tools, top25=TOP25_CWES, by=None):
+    """Fraction of the Top-25 CWEs found by tools t and u together
+    (diagonal: by t alone)."""
+    groups, n_groups, labels = _groups(df, by)   # repos without Top-25 findings get 0
+    sel = df["cwe"].isin(top25).to_numpy()
+    top = df[sel]
+    items = codes(top["cwe"], top25)
+    if by:
+        groups = groups[sel]
+        items = groups * len(top25) + items
+    inter = pairwise_counts(items, codes(top["tool"], tools), len(tools), groups, n_groups)
+    sizes = np.diagonal(inter, axis1=-2, axis2=-1)
+    union = sizes[..., :, None] + sizes[..., None, :] - inter
+    return _frames(union / len(top25), tools, labels)
+
+
+# ====== PER-TOOL TOTALS ======
+def tool_cwe_breakdown(all_data, tools, top25=TOP25_CWES):
+    """Total findings per tool and CWE over all repos (tool_cwe_breakdown.csv),
+    from consolidated rows; a tool without findings gets a "None" row."""
+    df = pd.DataFrame(all_data, columns=["Project_name", "Tool_name", "CWE_ID", "Number_of_Findings"])
+    totals = (df.groupby(["Tool_name", "CWE_ID"], sort=False)["Number_of_Findings"].sum()
+              .reset_index(name="Total_Number_of_Findings"))
+    empty = [t for t in tools if t not in set(totals["Tool_name"])]
+    totals = pd.concat([totals, pd.DataFrame({"Tool_name": empty, "CWE_ID": "None",
+                                              "Total_Number_of_Findings": 0})], ignore_index=True)
+    # tools in the given order, each tool's CWEs in order of first appearance
+    totals = totals.iloc[np.argsort(codes(totals["Tool_name"], tools), kind="stable")].reset_index(drop=True)
+    totals["Is_In_CWE_Top_25?"] = np.where(totals["CWE_ID"].isin(top25), "Yes", "No")
+    return totals
+
+
+def write_report(df, tools, out_dir, window=0, top25=TOP25_CWES, by_repo=False):
+    """Write the overlap matrices as CSV files; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    tables = {
+        "tool_iou_matrix.csv": cwe_jaccard(df, tools).round(2),
+        "tool_location_iou.csv": location_iou(df, tools, window).round(4),
+        "tool_location_counts.csv": location_counts(df, tools, window),
+        "tool_top25_coverage.csv": top25_coverage(df, tools, top25).round(4),
+    }
+    if by_repo:
+        tables["repo_location_iou.csv"] = location_iou(df, tools, window, by="repo")
+        tables["repo_top25_coverage.csv"] = top25_coverage(df, tools, top25, by="repo")
+    paths = []
+    for name, table in tables.items():
+        path = os.path.join(out_dir, name)
+        table.to_csv(path, index="repo" not in table.columns)   # square matrices keep tool labels
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    from findings_store import FindingsStore
+
+    parser = argparse.ArgumentParser(description="Pairwise tool overlap (CWE Jaccard, location IoU, "
+                                                 "Top-25 coverage) from the findings store")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--repos", nargs="+", default=None, help="Repos to include (default: all)")
+    parser.add_argument("--tools", nargs="+", default=TOOLS)
+    parser.add_argument("--window", type=int, default=0, help="Lines within which findings share a location")
+    parser.add_argument("--by-repo", action="store_true", help="Also write per-repo matrices")
+    parser.add_argument("--out", default="results", help="Output directory")
+    args = parser.parse_args()
+
+    store = FindingsStore(args.db)
+    df = load_findings(store, args.repos, args.tools)
+    store.close()
+    print(f"{len(df)} (finding, CWE) rows, {df['repo'].nunique()} repos")
+    print("\nCWE Jaccard:")
+    print(cwe_jaccard(df, args.tools).round(2))
+    print(f"\nLocation IoU (window {args.window}):")
+    print(location_iou(df, args.tools, args.window).round(3))
+    print("\nTop-25 coverage (diagonal: tool alone, off-diagonal: pair):")
+    print(top25_coverage(df, args.tools).round(2))
+    for path in write_report(df, args.tools, args.out, args.window, by_repo=args.by_repo):
+        print(f"saved {path}")
@@ -0,0 +1,361 @@
+"""
+Parallel, incremental runner for the scanners used in cse_stt.ipynb.
+
+cppcheck, flawfinder and semgrep run concurrently across repos and file
+shards in one worker pool; cppcheck (-j) and semgrep (--jobs) also get their
+own parallelism inside each shard. Output for every source file is cached
+under <results>/.scan_cache keyed by tool, tool version, path and content
+hash, so unchanged files are not rescanned. The combined per-repo outputs
+keep the notebook's formats:
+
+    results/<repo>_cppcheck.xml    <results> wrapping one cppcheck XML document per file
+    results/<repo>_flawfinder.csv  flawfinder --context --csv
+    results/<repo>_semgrep.json    semgrep --json
+
+Usage:
+    python scan_runner.py repo_1 repo_2 repo_3 --results results
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from glob import glob
+
+TOOLS = ["cppcheck", "flawfinder", "semgrep"]
+# Files each tool scans, matching the notebook's original invocations:
+# cppcheck was given .c/.cpp/.h files, flawfinder and semgrep the whole repo
+# (flawfinder then picks its own C/C++ extensions, semgrep the C/C++ files
+# its rules apply to)
+SOURCE_EXTENSIONS = (".c", ".cpp", ".h")
+TOOL_EXTENSIONS = {
+    "cppcheck": SOURCE_EXTENSIONS,
+    "flawfinder": (".c", ".h", ".ec", ".ecp", ".pgc", ".C", ".cpp", ".CPP", ".cxx", ".c++",
+                   ".cc", ".CC", ".pcc", ".hpp", ".H"),
+    "semgrep": (".c", ".h", ".cpp", ".cc", ".cxx", ".c++", ".hpp", ".hh", ".hxx", ".h++"),
+}
+SEMGREP_CONFIG = "p/cpp-security-audit"  # C/C++ security rules with CWE mapping
+
+# Environment overrides for the executables (e.g. CPPCHECK="C:\Program Files\Cppcheck\cppcheck.exe")
+TOOL_ENV = {"cppcheck": "CPPCHECK", "flawfinder": "FLAWFINDER", "semgrep": "SEMGREP"}
+# Default install locations tried when a tool is not on PATH
+TOOL_FALLBACKS = {"cppcheck": [r"C:\Program Files\Cppcheck\cppcheck.exe"]}
+
+
+# ====== TOOLS ======
+def find_tool(tool):
+    """Path of the tool's executable, or None if it is not installed."""
+    exe = os.environ.get(TOOL_ENV[tool])
+    if exe:
+        return exe
+    exe = shutil.which(tool)
+    if exe:
+        return exe
+    for path in TOOL_FALLBACKS.get(tool, []):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def tool_version(exe):
+    out = subprocess.run([exe, "--version"], capture_output=True, text=True)
+    return (out.stdout or out.stderr).strip().splitlines()[0] if (out.stdout or out.stderr).strip() else "unknown"
+
+
+def collect_sources(repo, extensions=SOURCE_EXTENSIONS):
+    files = set()
+    for ext in extensions:
+        files.update(glob(os.path.join(repo, "**", "*" + ext), recursive=True))
+    return sorted(files)
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ====== PER-FILE CACHE ======
+class ScanCache:
+    """One entry per (tool, version, options, path, content hash)."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def key(self, tool, version, options, path, digest):
+        raw = "\0".join([tool, version, options, path.replace("\\", "/"), digest])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, tool, key):
+        return os.path.join(self.cache_dir, tool, key + ".json")
+
+    def load(self, tool, key):
+        try:
+            with open(self._path(tool, key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, tool, key, value):
+        path = self._path(tool, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+
+
+# ====== SCANNERS ======
+# Each scanner runs one tool on a shard of files and returns ({path: output},
+# meta) where output is what the combined file needs for that path (an XML
+# document, a list of CSV rows, a list of semgrep results) and meta holds
+# run-level "errors", the paths whose output must not be cached ("uncached")
+# and flawfinder's CSV "header".
+
+def tool_failure(tool, proc):
+    """Run-level error for a tool that exited non-zero or printed nothing:
+    none of the shard's files get results, so none of them are cached."""
+    if proc.returncode != 0:
+        message = f"{tool} exited with status {proc.returncode}"
+    else:
+        message = f"{tool} produced no output"
+    detail = (proc.stderr.strip() or proc.stdout.strip()).splitlines()
+    if detail:
+        message += f": {detail[-1]}"
+    return {}, {"errors": [{"message": message}]}
+
+
+def scan_cppcheck(exe, files, tool_jobs, version):
+    cmd = [exe, "--enable=warning", "--xml", "--xml-version=2", f"-j{tool_jobs}"] + files
+    proc = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+    # the XML report goes to stderr and is there even when nothing is found
+    if proc.returncode != 0 or not proc.stderr.strip():
+        return tool_failure("cppcheck", proc)
+    per_file = {path: [] for path in files}
+    try:
+        root = ET.fromstring(proc.stderr)
+    except ET.ParseError as e:
+        return {}, {"errors": [{"message": f"unparsable cppcheck output: {e}"}]}
+    by_norm = {os.path.normpath(p): p for p in files}
+    for error in root.iter("error"):
+        loc = error.find("location")
+        path = error.get("file0") or (loc.get("file") if loc is not None else None)
+        path = by_norm.get(os.path.normpath(path)) if path else None
+        if path is not None:
+            per_file[path].append(ET.tostring(error, encoding="unicode").strip())
+    # same document shape as running cppcheck on the file alone
+    out = {}
+    for path, errors in per_file.items():
+        body = "".join(f"        {e}\n" for e in errors)
+        out[path] = ('<?xml version="1.0" encoding="UTF-8"?>\n<results version="2">\n'
+                     f'    <cppcheck version="{version.split()[-1]}"/>\n    <errors>\n{body}    </errors>\n</results>\n')
+    return out, {"errors": []}
+
+
+def scan_flawfinder(exe, files, tool_jobs, version):
+    proc = subprocess.run([exe, "--context", "--csv"] + files, capture_output=True, text=True, errors="replace")
+    # --csv always prints the header row
+    if proc.returncode != 0 or not proc.stdout.strip():
+        return tool_failure("flawfinder", proc)
+    out = {path: [] for path in files}
+    reader = csv.reader(io.StringIO(proc.stdout))
+    header = next(reader, None)
+    by_norm = {os.path.normpath(p): p for p in files}
+    for row in reader:
+        path = by_norm.get(os.path.normpath(row[0])) if row else None
+        if path is not None:
+            out[path].append(row)
+    return out, {"errors": [], "header": header}
+
+
+def scan_semgrep(exe, files, tool_jobs, version, config=SEMGREP_CONFIG):
+    cmd = [exe, f"--config={config}", "--json", "--jobs", str(tool_jobs)] + files
+    proc = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+    out = {path: [] for path in files}
+    try:
+        data = json.loads(proc.stdout)
+    except ValueError:
+        return {}, {"errors": [{"message": proc.stderr.strip() or "semgrep produced no JSON output"}]}
+    by_norm = {os.path.normpath(p): p for p in files}
+    for result in data.get("results", []):
+        path = by_norm.get(os.path.normpath(result.get("path", "")))
+        if path is not None:
+            out[path].append(result)
+    errors = data.get("errors", [])
+    if any(not e.get("path") for e in errors):
+        # a run-level failure (e.g. the configuration) applies to every file:
+        # do not cache the empty results
+        return {}, {"errors": errors}
+    # per-file errors (parse errors are routine on C sources): keep the file's
+    # partial results in this run's output, but scan it again next time
+    uncached = {by_norm.get(os.path.normpath(e["path"]), e["path"]) for e in errors}
+    return out, {"errors": errors, "uncached": uncached}
+
+
+SCANNERS = {"cppcheck": scan_cppcheck, "flawfinder": scan_flawfinder, "semgrep": scan_semgrep}
+# semgrep's startup (rule loading) dominates small shards: one shard per repo
+SHARDED = {"cppcheck": True, "flawfinder": True, "semgrep": False}
+
+
+# ====== COMBINED OUTPUTS ======
+def write_cppcheck(path, files, outputs):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<results>\n")
+        for src in files:
+            f.write(outputs.get(src, ""))
+        f.write("</results>")
+
+
+def write_flawfinder(path, files, outputs, header):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(header)
+        for src in files:
+            writer.writerows(outputs.get(src, []))
+
+
+def write_semgrep(path, files, outputs, errors, version):
+    data = {"version": version, "results": [r for src in files for r in outputs.get(src, [])],
+            "errors": errors, "paths": {"scanned": files}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+# ====== RUNNER ======
+def shards(files, size):
+    for i in range(0, len(files), size):
+        yield files[i:i + size]
+
+
+def run_scans(repos, tools=TOOLS, results_dir="results", workers=None, tool_jobs=2, shard_size=64,
+              semgrep_config=SEMGREP_CONFIG, force=False, verbose=True):
+    """Scan every repo with every available tool and write the combined
+    outputs to results_dir. Tools that are not installed are skipped.
+    Returns {(repo, tool): {files, cached, scanned, seconds}}."""
+    os.makedirs(results_dir, exist_ok=True)
+    cache = ScanCache(os.path.join(results_dir, ".scan_cache"))
+    exes, versions = {}, {}
+    for tool in tools:
+        exe = find_tool(tool)
+        if exe is None:
+            print(f"{tool} not found (install it or set ${TOOL_ENV[tool]}); skipping")
+            continue
+        exes[tool], versions[tool] = exe, tool_version(exe)
+    options = {"cppcheck": "--enable=warning", "flawfinder": "--context", "semgrep": semgrep_config}
+
+    sources = {(repo, tool): collect_sources(repo, TOOL_EXTENSIONS[tool]) for repo in repos for tool in exes}
+    digests = {}
+    for files in sources.values():
+        for src in files:
+            if src not in digests:
+                digests[src] = file_hash(src)
+
+    # per (repo, tool): outputs from the cache first, the rest is scanned
+    outputs, keys, todo, errors, stats, headers = {}, {}, [], {}, {}, {}
+    for job, files in sources.items():
+        tool = job[1]
+        outputs[job], errors[job] = {}, []
+        missing = []
+        for src in files:
+            key = cache.key(tool, versions[tool], options[tool], src, digests[src])
+            keys[(tool, src)] = key
+            hit = None if force else cache.load(tool, key)
+            if hit is None:
+                missing.append(src)
+            else:
+                outputs[job][src] = hit
+        stats[job] = {"files": len(files), "cached": len(files) - len(missing), "scanned": 0, "seconds": 0.0}
+        for shard in (shards(missing, shard_size) if SHARDED[tool] else [missing]):
+            if shard:
+                todo.append((job, shard))
+
+    def run(task):
+        (repo, tool), shard = task
+        t0 = time.perf_counter()
+        scanner = SCANNERS[tool]
+        if tool == "semgrep":
+            res = scanner(exes[tool], shard, tool_jobs, versions[tool], config=semgrep_config)
+        else:
+            res = scanner(exes[tool], shard, tool_jobs, versions[tool])
+        return res, time.perf_counter() - t0
+
+    # cppcheck and semgrep each use tool_jobs cores: size the pool so that the
+    # tools together do not oversubscribe the machine
+    workers = workers or max(1, (os.cpu_count() or 1) // max(1, tool_jobs))
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, task): task for task in todo}
+        for fut in as_completed(futures):
+            job, shard = futures[fut]
+            tool = job[1]
+            (per_file, meta), secs = fut.result()
+            uncached = meta.get("uncached", ())
+            for src, value in per_file.items():
+                outputs[job][src] = value
+                if src not in uncached:
+                    cache.store(tool, keys[(tool, src)], value)
+            errors[job].extend(meta["errors"])
+            if meta.get("header"):
+                headers[tool] = meta["header"]
+            stats[job]["scanned"] += len(per_file)
+            stats[job]["seconds"] += secs
+            done += 1
+            if verbose:
+                print(f"\r[{done}/{len(todo)}] shards scanned", end="", file=sys.stderr, flush=True)
+    if verbose and todo:
+        print(file=sys.stderr)
+
+    for (repo, tool), out in outputs.items():
+        files = sources[(repo, tool)]
+        path = os.path.join(results_dir, f"{os.path.basename(os.path.normpath(repo))}_{tool}")
+        if tool == "cppcheck":
+            write_cppcheck(path + ".xml", files, out)
+        elif tool == "flawfinder":
+            header = _flawfinder_header(cache, versions[tool], headers.get(tool))
+            write_flawfinder(path + ".csv", files, out, header)
+        else:
+            write_semgrep(path + ".json", files, out, errors[(repo, tool)], versions[tool])
+        if tool != "semgrep":
+            # semgrep's errors are kept in its JSON output; the others have no place for them
+            for error in errors[(repo, tool)]:
+                print(f"{repo} {tool}: {error['message']}", file=sys.stderr)
+        if verbose:
+            st = stats[(repo, tool)]
+            print(f"{repo} {tool}: {st['files']} files, {st['cached']} unchanged, {st['scanned']} scanned")
+    return stats
+
+
+def _flawfinder_header(cache, version, header):
+    # the CSV header only comes with a fresh run; remember it for all-cached runs
+    key = cache.key("flawfinder", version, "header", "", "")
+    if header:
+        cache.store("flawfinder", key, header)
+        return header
+    return cache.load("flawfinder", key)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run cppcheck, flawfinder and semgrep over repos in parallel, "
+                                                 "rescanning only changed files")
+    parser.add_argument("repos", nargs="+", help="Repository directories to scan")
+    parser.add_argument("--results", default="results", help="Output directory")
+    parser.add_argument("--tools", nargs="+", choices=TOOLS, default=TOOLS)
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent tool processes (default: CPU count / --tool-jobs)")
+    parser.add_argument("--tool-jobs", type=int, default=2, help="cppcheck -j / semgrep --jobs per process")
+    parser.add_argument("--shard-size", type=int, default=64, help="Files per cppcheck/flawfinder process")
+    parser.add_argument("--semgrep-config", default=SEMGREP_CONFIG)
+    parser.add_argument("--force", action="store_true", help="Ignore the per-file cache")
+    args = parser.parse_args()
+    run_scans(args.repos, args.tools, args.results, args.workers, args.tool_jobs, args.shard_size,
+              args.semgrep_config, args.force)
@@ -0,0 +1,109 @@
+from findings_store import FindingsStore
+
+HEADER = "File,Line,CWEs,Name,Warning\n"
+STRCPY = "src/a.c,10,CWE-120,strcpy,copy\n"
+SPRINTF = "src/a.c,20,CWE-120!/CWE-134,sprintf,format\n"
+CHMOD = "src/b.c,5,CWE-362,chmod,race\n"
+SYSTEM = "src/b.c,8,CWE-78,system,shell\n"
+
+
+def write_output(results, *rows):
+    (results / "repo_flawfinder.csv").write_text(HEADER + "".join(rows))
+
+
+def open_findings(store):
+    return store.db.execute("SELECT file, line, rule, occurrences FROM findings "
+                            "WHERE fixed_run IS NULL AND stale_run IS NULL ORDER BY file, line").fetchall()
+
+
+def short(rows):
+    return [(file, line, rule) for _, _, file, line, rule, _ in rows]
+
+
+def test_first_run_ingests_and_deduplicates(tmp_path):
+    write_output(tmp_path, STRCPY, STRCPY, SPRINTF, CHMOD)
+    store = FindingsStore(str(tmp_path / "findings.db"))
+    run, status = store.ingest(str(tmp_path), ["repo"], verbose=False)
+    assert status == {("repo", "cppcheck"): "missing", ("repo", "flawfinder"): "ingested",
+                      ("repo", "semgrep"): "missing"}
+    assert open_findings(store) == [("src/a.c", 10, "strcpy", 2), ("src/a.c", 20, "sprintf", 1),
+                                    ("src/b.c", 5, "chmod", 1)]
+    d = store.diff(run)
+    assert short(d["new"]) == [("src/a.c", 10, "strcpy"), ("src/a.c", 20, "sprintf"), ("src/b.c", 5, "chmod")]
+    assert d["new"][1][5] == "CWE-120,CWE-134"
+    assert d["fixed"] == []
+    store.close()
+
+
+def test_unchanged_output_is_not_reparsed(tmp_path, monkeypatch):
+    write_output(tmp_path, STRCPY, CHMOD)
+    store = FindingsStore(str(tmp_path / "findings.db"))
+    store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+
+    def no_parse(*args):
+        raise AssertionError("unchanged output parsed again")
+
+    monkeypatch.setattr(store, "_ingest_source", no_parse)
+    run, status = store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    assert status == {("repo", "flawfinder"): "unchanged"}
+    assert store.diff(run) == {"new": [], "fixed": [], "stale": []}
+    assert store.db.execute("SELECT DISTINCT last_run FROM findings").fetchall() == [(run,)]
+    assert len(open_findings(store)) == 2
+    monkeypatch.undo()
+    # forcing a re-parse of the same output changes nothing either
+    run, status = store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], force=True, verbose=False)
+    assert status == {("repo", "flawfinder"): "ingested"}
+    assert store.diff(run) == {"new": [], "fixed": [], "stale": []}
+    store.close()
+
+
+def test_diff_reports_new_and_fixed_findings(tmp_path):
+    write_output(tmp_path, STRCPY, SPRINTF, CHMOD)
+    store = FindingsStore(str(tmp_path / "findings.db"))
+    store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    write_output(tmp_path, STRCPY, CHMOD, SYSTEM)
+    run2, _ = store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    d = store.diff(run2)
+    assert short(d["new"]) == [("src/b.c", 8, "system")]
+    assert short(d["fixed"]) == [("src/a.c", 20, "sprintf")]
+    assert [row[2] for row in open_findings(store)] == ["strcpy", "chmod", "system"]
+    assert store.cwe_counts(("tool",)) == [("flawfinder", "CWE-120", 1), ("flawfinder", "CWE-362", 1),
+                                           ("flawfinder", "CWE-78", 1)]
+    # a fixed finding that comes back is new again in that run
+    write_output(tmp_path, STRCPY, SPRINTF, CHMOD, SYSTEM)
+    run3, _ = store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    assert store.diff(run3) == {"new": [("flawfinder", "repo", "src/a.c", 20, "sprintf", "CWE-120,CWE-134")],
+                                "fixed": [], "stale": []}
+    store.close()
+
+
+def test_missing_output_marks_findings_stale(tmp_path):
+    write_output(tmp_path, STRCPY, CHMOD)
+    store = FindingsStore(str(tmp_path / "findings.db"))
+    store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    (tmp_path / "repo_flawfinder.csv").unlink()
+    run2, status = store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    assert status == {("repo", "flawfinder"): "missing"}
+    d = store.diff(run2)
+    assert short(d["stale"]) == [("src/a.c", 10, "strcpy"), ("src/b.c", 5, "chmod")]
+    assert d["new"] == d["fixed"] == []
+    assert open_findings(store) == store.findings_at("src/a.c") == store.cwe_counts(("tool",)) == []
+    # the same output comes back: parsed again, one finding is gone
+    write_output(tmp_path, STRCPY)
+    run3, status = store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    assert status == {("repo", "flawfinder"): "ingested"}
+    d = store.diff(run3)
+    assert d["new"] == d["stale"] == []
+    assert short(d["fixed"]) == [("src/b.c", 5, "chmod")]
+    assert open_findings(store) == [("src/a.c", 10, "strcpy", 1)]
+    store.close()
+
+
+def test_reingest_replaces_a_findings_cwes(tmp_path):
+    write_output(tmp_path, SPRINTF)
+    store = FindingsStore(str(tmp_path / "findings.db"))
+    store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    write_output(tmp_path, SPRINTF.replace("CWE-120!/CWE-134", "CWE-134"))
+    store.ingest(str(tmp_path), ["repo"], tools=["flawfinder"], verbose=False)
+    assert store.cwe_counts(("tool",)) == [("flawfinder", "CWE-134", 1)]
+    store.close()
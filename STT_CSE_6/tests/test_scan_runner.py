@@ -0,0 +1,134 @@
+import json
+import os
+import sys
+
+import scan_runner
+
+# Stand-ins for the real tools: they print a version, or report one finding
+# per file given on the command line, in each tool's output format.
+FAKE_SEMGREP = '''
+import json, sys
+if "--version" in sys.argv:
+    print("1.0.0"); sys.exit()
+files = [a for a in sys.argv[1:] if not a.startswith("-") and a[0] != "{" and not a.isdigit()]
+with open(os.environ["SEMGREP_LOG"], "a") as log:
+    log.write(" ".join(files) + "\\n")
+results = [{"path": f, "check_id": "rule", "start": {"line": 1}, "extra": {"message": "m"}} for f in files]
+errors = [{"type": "Syntax error", "path": f, "message": "parse"} for f in files if "bad" in f]
+print(json.dumps({"results": results, "errors": errors}))
+'''
+
+FAKE_CPPCHECK = '''
+import sys
+if "--version" in sys.argv:
+    print("Cppcheck 2.13"); sys.exit()
+files = [a for a in sys.argv[1:] if not a.startswith("-")]
+errors = "".join(f'<error id="x" msg="m" cwe="476" file0="./{f}"><location file="./{f}" line="1"/></error>'
+                 for f in files)
+sys.stderr.write(f'<?xml version="1.0"?><results version="2"><errors>{errors}</errors></results>')
+'''
+
+FAKE_FLAWFINDER = '''
+import sys
+if "--version" in sys.argv:
+    print("2.0.19"); sys.exit()
+print("File,Line,CWEs,Name,Warning")
+for f in sys.argv[1:]:
+    if not f.startswith("-"):
+        print(f"{f},1,CWE-120,strcpy,w")
+'''
+
+
+def fake_tool(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_text(f"#!{sys.executable}\nimport os\n{body}")
+    path.chmod(0o755)
+    return str(path)
+
+
+def make_repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    for name in ("a.c", "bad.c", "b.cc", "c.hpp", "notes.txt"):
+        (repo / "src" / name).write_text("int x;\n")
+    return repo
+
+
+def test_scans_cache_and_scope(tmp_path, monkeypatch):
+    make_repo(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SEMGREP", fake_tool(tmp_path, "semgrep", FAKE_SEMGREP))
+    monkeypatch.setenv("CPPCHECK", fake_tool(tmp_path, "cppcheck", FAKE_CPPCHECK))
+    monkeypatch.setenv("FLAWFINDER", fake_tool(tmp_path, "flawfinder", FAKE_FLAWFINDER))
+    monkeypatch.setenv("SEMGREP_LOG", str(tmp_path / "semgrep.log"))
+
+    stats = scan_runner.run_scans(["repo"], results_dir="results", verbose=False)
+    # flawfinder and semgrep see every C/C++ file, cppcheck only .c/.cpp/.h
+    assert stats[("repo", "flawfinder")]["files"] == 4
+    assert stats[("repo", "semgrep")]["files"] == 4
+    assert stats[("repo", "cppcheck")]["files"] == 2
+    # cppcheck reports "./repo/..." paths; they are matched to the scanned files
+    with open(os.path.join("results", "repo_cppcheck.xml")) as f:
+        assert f.read().count("<error ") == 2
+    with open(os.path.join("results", "repo_semgrep.json")) as f:
+        data = json.load(f)
+    assert len(data["results"]) == 4 and len(data["errors"]) == 1
+
+    # second run: only the file semgrep could not parse is scanned again
+    stats = scan_runner.run_scans(["repo"], results_dir="results", verbose=False)
+    assert stats[("repo", "semgrep")]["cached"] == 3
+    assert stats[("repo", "cppcheck")]["cached"] == 2
+    assert stats[("repo", "flawfinder")]["cached"] == 4
+    runs = (tmp_path / "semgrep.log").read_text().splitlines()
+    assert runs[-1] == os.path.join("repo", "src", "bad.c")
+    with open(os.path.join("results", "repo_semgrep.json")) as f:
+        assert len(json.load(f)["results"]) == 4
+
+
+def test_run_level_semgrep_error_is_not_cached(tmp_path, monkeypatch):
+    make_repo(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    broken = "import sys\nif '--version' in sys.argv: print('1.0.0'); sys.exit()\n" \
+             "print('{\"results\": [], \"errors\": [{\"type\": \"config\", \"message\": \"no rules\"}]}')"
+    monkeypatch.setenv("SEMGREP", fake_tool(tmp_path, "semgrep", broken))
+    stats = scan_runner.run_scans(["repo"], tools=["semgrep"], results_dir="results", verbose=False)
+    assert stats[("repo", "semgrep")]["scanned"] == 0
+    stats = scan_runner.run_scans(["repo"], tools=["semgrep"], results_dir="results", verbose=False)
+    assert stats[("repo", "semgrep")]["cached"] == 0
+
+
+def test_failed_tool_run_is_reported_and_not_cached(tmp_path, monkeypatch, capsys):
+    make_repo(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    crash = "import sys\nif '--version' in sys.argv: print('2.0.19'); sys.exit()\n" \
+            "sys.stderr.write('out of memory\\n'); sys.exit(15)"
+    monkeypatch.setenv("FLAWFINDER", fake_tool(tmp_path, "flawfinder", crash))
+    monkeypatch.setenv("CPPCHECK", fake_tool(tmp_path, "cppcheck", "print('Cppcheck 2.13')"))
+    tools = ["cppcheck", "flawfinder"]
+    stats = scan_runner.run_scans(["repo"], tools=tools, results_dir="results", verbose=False)
+    assert stats[("repo", "flawfinder")]["scanned"] == 0
+    assert stats[("repo", "cppcheck")]["scanned"] == 0
+    err = capsys.readouterr().err
+    assert "repo flawfinder: flawfinder exited with status 15: out of memory" in err
+    assert "repo cppcheck: cppcheck produced no output" in err
+    # once the tools work again, every file is scanned
+    monkeypatch.setenv("FLAWFINDER", fake_tool(tmp_path, "flawfinder", FAKE_FLAWFINDER))
+    monkeypatch.setenv("CPPCHECK", fake_tool(tmp_path, "cppcheck", FAKE_CPPCHECK))
+    stats = scan_runner.run_scans(["repo"], tools=tools, results_dir="results", verbose=False)
+    assert (stats[("repo", "flawfinder")]["cached"], stats[("repo", "flawfinder")]["scanned"]) == (0, 4)
+    assert (stats[("repo", "cppcheck")]["cached"], stats[("repo", "cppcheck")]["scanned"]) == (0, 2)
+
+
+def test_default_pool_accounts_for_tool_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    seen = {}
+
+    class Pool(scan_runner.ThreadPoolExecutor):
+        def __init__(self, max_workers=None):
+            seen["workers"] = max_workers
+            super().__init__(max_workers)
+
+    monkeypatch.setattr(scan_runner, "ThreadPoolExecutor", Pool)
+    monkeypatch.setattr(scan_runner, "find_tool", lambda tool: None)
+    scan_runner.run_scans([], results_dir=str(tmp_path / "results"), tool_jobs=4, verbose=False)
+    assert seen["workers"] == 2
@@ -0,0 +1,267 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+import cfg_reaching_definitions as crd
+
+
+# ----------------- Synthetic C generator -----------------
+# Each shape stresses a different phase: straight-line code (leaders/blocks),
+# deep if/else nesting (brace matching, edges), nested loops (back edges,
+# solver passes) and variables redefined in loops (definitions, gen/kill).
+
+SHAPES = ('straight', 'nested_if', 'nested_loops', 'loop_redefs')
+
+
+def gen_straight(n, rng):
+    body = []
+    for i in range(n):
+        v = f'v{i % 50}'
+        body.append(f'    {v} = {v} + {rng.randint(1, 9)};')
+    return body
+
+
+def gen_nested_if(n, rng):
+    body = []
+    depth = 0
+    for i in range(n):
+        ind = '    ' * (depth + 1)
+        body.append(f'{ind}x{i % 20} = {i};')
+        body.append(f'{ind}if (x{i % 20} > {rng.randint(0, 100)}) {{')
+        depth += 1
+        # unwind every so often so nesting stays bounded but deep
+        if depth >= 40 or i == n - 1:
+            while depth:
+                depth -= 1
+                ind = '    ' * (depth + 1)
+                body.append(f'{ind}    y = {i};')
+                body.append(f'{ind}}} ')
+                body.append(f'{ind}else {{')
+                body.append(f'{ind}    y = {i + 1};')
+                body.append(f'{ind}}}')
+    return body
+
+
+def gen_nested_loops(n, rng):
+    body = []
+    depth = 0
+    for i in range(n):
+        ind = '    ' * (depth + 1)
+        kw = 'for' if i % 2 == 0 else 'while'
+        if kw == 'for':
+            body.append(f'{ind}for (i{depth} = 0; i{depth} < {rng.randint(2, 9)}; i{depth}++) {{')
+        else:
+            body.append(f'{ind}while (s < {rng.randint(10, 99)}) {{')
+        body.append(f'{ind}    s = s + {i};')
+        depth += 1
+        if depth >= 8 or i == n - 1:
+            while depth:
+                depth -= 1
+                ind = '    ' * (depth + 1)
+                body.append(f'{ind}}}')
+                body.append(f'{ind}t = s;')
+    return body
+
+
+def gen_loop_redefs(n, rng):
+    body = []
+    nvars = max(1, n // 4)
+    for i in range(n):
+        body.append(f'    for (k = 0; k < {rng.randint(2, 9)}; k++) {{')
+        for j in range(4):
+            v = f'r{(i * 4 + j) % nvars}'
+            body.append(f'        {v} = {v} * {j + 2} + k;')
+        body.append('    }')
+    return body
+
+
+GENERATORS = {
+    'straight': gen_straight,
+    'nested_if': gen_nested_if,
+    'nested_loops': gen_nested_loops,
+    'loop_redefs': gen_loop_redefs,
+}
+
+
+def generate_c(shape, n, seed=0):
+    """Synthetic C source of the given shape; n scales the statement count."""
+    rng = random.Random(seed)
+    body = GENERATORS[shape](n, rng)
+    return '\n'.join(['#include <stdio.h>', '', 'int main() {',
+                      '    int s = 0, t = 0, y = 0, k = 0;'] + body + ['    return 0;', '}', ''])
+
+
+# ----------------- Phase runner -----------------
+# The pipeline runs as analyze_c_file runs it: the file is split into units
+# and every phase after split_units is timed across all units through the
+# analyzer's own Profiler, so a phase's time is its total over the units.
+
+def run_phases(code, prof):
+    """Run the per-unit pipeline on code, timing each phase into prof.
+    Returns the prepared units, each with its dense solver 'stats'."""
+    with prof.phase('preprocess'):
+        lines = crd.preprocess(code)
+    # split_units, then leaders, blocks, edges, definitions and gen_kill per unit
+    units = crd.prepare_units(lines, prof=prof)
+    for u in units:
+        with prof.phase('solve'):
+            _, _, _, u['stats'], _ = crd.solve_unit(u, history='none')
+        with prof.phase('solve_sparse'):
+            crd.solve_unit(u, solver='sparse')
+    prof.count('lines', len(lines))
+    return units
+
+
+def bench_source(code, repeat=3):
+    """Best-of-`repeat` wall time and tracemalloc peak (bytes, the largest
+    over the units) per phase."""
+    times = {}
+    for _ in range(repeat):
+        prof = crd.Profiler()
+        run_phases(code, prof)
+        for name, rec in prof.phases.items():
+            times[name] = min(rec['time'], times.get(name, rec['time']))
+    # memory is measured in a separate run: tracing skews the timings
+    prof = crd.Profiler(trace_memory=True)
+    tracemalloc.start()
+    try:
+        units = run_phases(code, prof)
+    finally:
+        tracemalloc.stop()
+    peaks = {name: rec['peak'] for name, rec in prof.phases.items()}
+    counts = {
+        'lines': prof.counters['lines'],
+        'units': len(units),
+        'blocks': sum(len(u['blocks']) for u in units),
+        'edges': sum(len(u['edges']) for u in units),
+        'definitions': sum(len(u['defs']) for u in units),
+        'evaluations': sum(u['stats']['evaluations'] for u in units),
+    }
+    return times, peaks, counts
+
+
+def run_suite(shapes, sizes, repeat=3, seed=0, verbose=True):
+    results = []
+    for shape in shapes:
+        for n in sizes:
+            code = generate_c(shape, n, seed)
+            times, peaks, counts = bench_source(code, repeat)
+            results.append({'shape': shape, 'size': n, 'time': times, 'peak': peaks, 'counts': counts})
+            if verbose:
+                total = sum(times.values())
+                print(f'{shape:>13} n={n:<6} lines={counts["lines"]:<7} units={counts["units"]:<4} blocks={counts["blocks"]:<6} '
+                      f'defs={counts["definitions"]:<6} total={total * 1000:9.2f} ms')
+    return results
+
+
+# ----------------- Reports -----------------
+
+def compare_runs(base, new, threshold=0.25):
+    """Per (shape, size, phase) time ratios new/base; returns the rows whose
+    ratio exceeds 1 + threshold (regressions)."""
+    base_idx = {(r['shape'], r['size']): r for r in base}
+    regressions = []
+    for r in new:
+        b = base_idx.get((r['shape'], r['size']))
+        if b is None:
+            continue
+        for phase, t in r['time'].items():
+            bt = b['time'].get(phase)
+            # ignore sub-millisecond phases, they are mostly timer noise
+            if not bt or max(bt, t) < 1e-3:
+                continue
+            ratio = t / bt
+            if ratio > 1 + threshold:
+                regressions.append({'shape': r['shape'], 'size': r['size'], 'phase': phase,
+                                    'base': bt, 'new': t, 'ratio': round(ratio, 2)})
+    return regressions
+
+
+def plot_runs(runs, outpng):
+    """Time-vs-size curve per shape and phase; one line style per run."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib is not installed; skipping plot')
+        return
+    shapes = sorted({r['shape'] for results in runs.values() for r in results})
+    fig, axes = plt.subplots(1, len(shapes), figsize=(5 * len(shapes), 4), squeeze=False)
+    styles = ['-', '--', ':', '-.']
+    for ax, shape in zip(axes[0], shapes):
+        for k, (label, results) in enumerate(runs.items()):
+            rows = sorted((r for r in results if r['shape'] == shape), key=lambda r: r['size'])
+            if not rows:
+                continue
+            for phase in rows[0]['time']:
+                ax.plot([r['size'] for r in rows], [r['time'][phase] * 1000 for r in rows],
+                        styles[k % len(styles)], label=f'{label}:{phase}')
+        ax.set_title(shape)
+        ax.set_xlabel('size')
+        ax.set_ylabel('ms')
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+    axes[0][-1].legend(fontsize='x-small')
+    fig.tight_layout()
+    fig.savefig(outpng)
+    print(f'Wrote scaling plot to {outpng}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Phase benchmarks for cfg_reaching_definitions')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p_run = sub.add_parser('run', help='Run the suite and write results as JSON')
+    p_run.add_argument('--shapes', nargs='+', choices=SHAPES, default=list(SHAPES))
+    p_run.add_argument('--sizes', nargs='+', type=int, default=[100, 300, 1000, 3000])
+    p_run.add_argument('--repeat', type=int, default=3)
+    p_run.add_argument('--seed', type=int, default=0)
+    p_run.add_argument('-o', '--output', default='bench_results.json')
+
+    p_gen = sub.add_parser('gen', help='Write one synthetic C file')
+    p_gen.add_argument('shape', choices=SHAPES)
+    p_gen.add_argument('size', type=int)
+    p_gen.add_argument('-o', '--output', default=None)
+    p_gen.add_argument('--seed', type=int, default=0)
+
+    p_cmp = sub.add_parser('compare', help='Compare runs: flag regressions and plot scaling curves')
+    p_cmp.add_argument('base', help='Baseline results JSON')
+    p_cmp.add_argument('new', nargs='+', help='Results JSON to compare against the baseline')
+    p_cmp.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown (0.25 = 25%%)')
+    p_cmp.add_argument('--plot', default=None, help='Write scaling curves to this PNG')
+
+    args = parser.parse_args()
+    if args.cmd == 'run':
+        results = run_suite(args.shapes, args.sizes, args.repeat, args.seed)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote benchmark results to {args.output}')
+    elif args.cmd == 'gen':
+        code = generate_c(args.shape, args.size, args.seed)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(code)
+        else:
+            sys.stdout.write(code)
+    else:
+        with open(args.base) as f:
+            base = json.load(f)
+        runs = {os.path.basename(args.base): base}
+        failed = False
+        for path in args.new:
+            with open(path) as f:
+                new = json.load(f)
+            runs[os.path.basename(path)] = new
+            regressions = compare_runs(base, new, args.threshold)
+            print(f'{path}: {len(regressions)} regressions vs {args.base}')
+            for r in regressions:
+                print(f"  {r['shape']} n={r['size']} {r['phase']}: "
+                      f"{r['base'] * 1000:.2f} ms -> {r['new'] * 1000:.2f} ms (x{r['ratio']})")
+            failed = failed or bool(regressions)
+        if args.plot:
+            plot_runs(runs, args.plot)
+        sys.exit(1 if failed else 0)
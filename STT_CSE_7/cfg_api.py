@@ -0,0 +1,260 @@
+import bisect
+import re
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import cfg_reaching_definitions as crd
+
+
+# ----------------- Library API -----------------
+# analyze_source / analyze_file return compact result objects with integer
+# block and definition IDs (B12 -> 12, D5 -> 5) and no file output or printing;
+# analyze_c_file (cfg_batch.py) is the reporting layer for the command line.
+# The result types are slotted dataclasses (dataclass(slots=True)), so this
+# module and ssa.py need Python 3.10 or later.
+
+@dataclass(slots=True)
+class Block:
+    id: int
+    start: int
+    end: int
+    lines: array        # indices of the block's non-empty lines
+
+
+@dataclass(slots=True)
+class Definition:
+    id: int
+    var: str
+    block: int
+    line: int
+
+
+@dataclass(slots=True)
+class FunctionCFG:
+    """CFG and reaching definitions of one function (or the '<global>' unit).
+
+    blocks have consecutive IDs, so blocks[i].id == blocks[0].id + i; gen,
+    kill, in_sets and out_sets are bit-vectors parallel to blocks, where bit
+    i stands for defs[i].
+    """
+    name: str
+    start: int
+    end: int
+    blocks: list
+    edges: list         # (src_id, dst_id, label)
+    defs: list
+    gen: list
+    kill: list
+    in_sets: list
+    out_sets: list
+    stats: dict
+    cached: bool = False
+    block_starts: list = field(default=None, repr=False)   # blocks[i].start, for bisect
+
+    def __post_init__(self):
+        if self.block_starts is None:
+            self.block_starts = [b.start for b in self.blocks]
+
+    def block_index(self, block_id):
+        return block_id - self.blocks[0].id
+
+    def defs_of(self, bits):
+        """Definitions whose bits are set in the bit-vector."""
+        out = []
+        while bits:
+            low = bits & -bits
+            out.append(self.defs[low.bit_length() - 1])
+            bits ^= low
+        return out
+
+    def reaching_in(self, block_id):
+        return self.defs_of(self.in_sets[self.block_index(block_id)])
+
+    def reaching_out(self, block_id):
+        return self.defs_of(self.out_sets[self.block_index(block_id)])
+
+    def metrics(self):
+        N = len(self.blocks)
+        E = len(self.edges)
+        return N, E, E - N + 2
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    path: str
+    lines: list
+    functions: list
+    profile: dict = None
+    _funcs: list = field(default=None, repr=False)     # functions without '<global>'
+    _starts: list = field(default=None, repr=False)    # their start lines, for bisect
+    _global: object = field(default=None, repr=False)  # the '<global>' unit, if any
+    _defs: dict = field(default=None, repr=False)
+
+    def metrics(self):
+        N = sum(len(fn.blocks) for fn in self.functions)
+        E = sum(len(fn.edges) for fn in self.functions)
+        CC = sum(fn.metrics()[2] for fn in self.functions)
+        return N, E, CC
+
+    def function(self, name):
+        for fn in self.functions:
+            if fn.name == name:
+                return fn
+        return None
+
+    def function_at(self, line):
+        """The function whose line range contains line, else the '<global>' unit."""
+        if self._starts is None:
+            self._funcs = [fn for fn in self.functions if fn.name != crd.GLOBAL_UNIT]
+            self._starts = [fn.start for fn in self._funcs]
+            self._global = self.function(crd.GLOBAL_UNIT)
+        k = bisect.bisect_right(self._starts, line) - 1
+        if k >= 0 and line <= self._funcs[k].end:
+            return self._funcs[k]
+        return self._global
+
+    def block_at(self, line):
+        """(FunctionCFG, Block) containing the given 0-based preprocessed line, or None."""
+        fn = self.function_at(line)
+        if fn is None or not fn.blocks:
+            return None
+        k = bisect.bisect_right(fn.block_starts, line) - 1
+        if k >= 0 and line <= fn.blocks[k].end:
+            return fn, fn.blocks[k]
+        return None
+
+    def definition(self, def_id):
+        # definition IDs are unique across the file: index them once
+        if self._defs is None:
+            self._defs = {d.id: d for fn in self.functions for d in fn.defs}
+        return self._defs.get(def_id)
+
+
+def _int_id(sid):
+    # 'B12' -> 12, 'D5' -> 5
+    return int(sid[1:])
+
+
+def to_function_cfg(u, in_sets, out_sets, stats, cached=False):
+    """Convert an internal unit dict plus its solution to a FunctionCFG."""
+    order = list(u['blocks'])
+    blocks = [Block(_int_id(bid), info['start'], info['end'], array('l', (i for i, _ in info['lines'])))
+              for bid, info in u['blocks'].items()]
+    edges = [(_int_id(a), _int_id(b), lab) for a, b, lab in u['edges']]
+    defs = [Definition(_int_id(did), m['var'], _int_id(m['block']), m['line_idx'])
+            for did, m in u['defs'].items()]
+    return FunctionCFG(
+        name=u['name'], start=u['start'], end=u['end'], blocks=blocks, edges=edges, defs=defs,
+        gen=[u['gen'][bid] for bid in order], kill=[u['kill'][bid] for bid in order],
+        in_sets=[in_sets[bid] for bid in order], out_sets=[out_sets[bid] for bid in order],
+        stats=stats, cached=cached)
+
+
+def analyze_source(code, path='<string>', cache=None, jobs=1, profile=False, solver='dense'):
+    """Analyze C source text and return an AnalysisResult (no files, no output)."""
+    prof = crd.Profiler(trace_memory=False)
+    with prof.phase('preprocess'):
+        lines = crd.preprocess(code)
+    units = crd.prepare_units(lines, cache, prof)
+    todo = [k for k, u in enumerate(units) if 'in' not in u]
+    solved = {}
+    if jobs is not None and jobs > 1 and len(todo) > 1:
+        solved = crd.solve_units_parallel(units, todo, jobs, 'none', prof, solver)
+    functions = []
+    for k, u in enumerate(units):
+        if 'in' in u:
+            functions.append(to_function_cfg(u, u['in'], u['out'], u['stats'], cached=True))
+            continue
+        if k in solved:
+            in_sets, out_sets, _, stats, _ = solved[k]
+        else:
+            with prof.phase('solve'):
+                in_sets, out_sets, _, stats, _ = crd.solve_unit(u, history='none', solver=solver)
+        if cache is not None:
+            with prof.phase('cache_store'):
+                cache.store(u['unit'], u, in_sets, out_sets, stats)
+        functions.append(to_function_cfg(u, in_sets, out_sets, stats))
+    if cache is not None:
+        cache.evict()
+    return AnalysisResult(path=path, lines=lines, functions=functions,
+                          profile=prof.to_dict() if profile else None)
+
+
+def analyze_file(path, cache=None, jobs=1, profile=False, solver='dense'):
+    """analyze_source on the contents of a .c file."""
+    with open(path, 'r') as f:
+        code = f.read()
+    return analyze_source(code, path=path, cache=cache, jobs=jobs, profile=profile, solver=solver)
+
+
+# ----------------- Def-use chains -----------------
+
+@dataclass(slots=True)
+class ChainIndex:
+    """Statement-level use-def / def-use chains of an AnalysisResult.
+
+    use_def[(line, var)] -> tuple of definition IDs reaching that use;
+    def_use[def_id] -> list of (line, var) uses the definition reaches.
+    """
+    use_def: dict
+    def_use: dict
+
+    def reaching(self, line, var):
+        return self.use_def.get((line, var), ())
+
+    def uses(self, def_id):
+        return self.def_use.get(def_id, [])
+
+
+def build_chains(result):
+    """Walk every block once, starting from its in[] set and applying each
+    statement's definition in order, recording which definitions reach each
+    use. Builds a ChainIndex for constant-time lookups."""
+    use_def = {}
+    def_use = defaultdict(list)
+    lines = result.lines
+    for fn in result.functions:
+        var_bits = defaultdict(int)
+        def_bit = {}
+        for i, d in enumerate(fn.defs):
+            var_bits[d.var] |= 1 << i
+            def_bit[d.line] = (d.var, 1 << i)
+        for k, block in enumerate(fn.blocks):
+            cur = fn.in_sets[k]
+            for ln_idx in block.lines:
+                target, uses = crd.statement_uses(lines[ln_idx])
+                for var in uses:
+                    bits = cur & var_bits.get(var, 0)
+                    ids = tuple(d.id for d in fn.defs_of(bits))
+                    use_def[(ln_idx, var)] = ids
+                    for did in ids:
+                        def_use[did].append((ln_idx, var))
+                if ln_idx in def_bit:
+                    var, bit = def_bit[ln_idx]
+                    cur = (cur & ~var_bits[var]) | bit
+    return ChainIndex(use_def=use_def, def_use=dict(def_use))
+
+
+QUERY_RE = re.compile(r'^\s*(\d+)\s*:\s*([A-Za-z_][A-Za-z0-9_]*)\s*$')
+
+
+def parse_query(text):
+    """'LINE:VAR' -> (line, var). Raises ValueError for anything else."""
+    m = QUERY_RE.match(text)
+    if m is None:
+        raise ValueError(f'bad query {text.strip()!r}: expected LINE:VAR, e.g. 40:count')
+    return int(m.group(1)), m.group(2)
+
+
+def answer_queries(result, chains, queries):
+    """Resolve (line, var) queries against a ChainIndex; returns JSON-ready dicts."""
+    out = []
+    for line, var in queries:
+        defs = []
+        for did in chains.reaching(line, var):
+            d = result.definition(did)
+            defs.append({'id': f'D{did}', 'line': d.line, 'block': f'B{d.block}',
+                         'text': result.lines[d.line].strip()})
+        out.append({'line': line, 'var': var, 'defs': defs})
+    return out
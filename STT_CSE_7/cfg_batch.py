@@ -0,0 +1,248 @@
+import csv
+import glob
+import json
+import os
+import sys
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cfg_reaching_definitions as crd
+from cfg_cache import AnalysisCache
+from cfg_render import COLLAPSE_BLOCKS, image_path, render_many, write_dot_units
+
+
+# ----------------- Reports -----------------
+
+def analyze_c_file(cpath, render=False, history='full', out_base=None, verbose=True, jobs=1, cache=None,
+                   profile=False, solver='dense', collapse_over=COLLAPSE_BLOCKS):
+    """Analyze one .c file and write <out_base>_cfg.dot / <out_base>_reaching.txt.
+
+    Each function gets its own CFG and reaching-definitions solution (plus a
+    '<global>' unit for file-scope code); with jobs > 1 the per-function
+    dataflow problems are solved in a process pool. If cache (an
+    AnalysisCache) is given, functions whose text is unchanged are loaded
+    from it instead of being recomputed; cached entries have no iteration
+    snapshots, so they are only loaded with history='none'. With
+    profile=True, per-phase time and allocation plus counters are written to
+    <out_base>_profile.json. solver selects the dense worklist or the sparse
+    SSA-based solver (see SOLVERS); both give the same in/out sets. render is
+    False or an image format from RENDER_FORMATS (True means 'png'); the
+    image is skipped when it is newer than an unchanged DOT file. Units with
+    more than collapse_over blocks are drawn collapsed. out_base defaults to
+    the file's basename in the current directory.
+    Returns a summary dict (file, functions, cached, nodes, edges, cyclomatic,
+    definitions, solver passes/evaluations and solver_time in seconds).
+    """
+    traced_here = profile and not tracemalloc.is_tracing()
+    if traced_here:
+        tracemalloc.start()
+    prof = crd.Profiler(trace_memory=profile)
+    try:
+        summary = _analyze(cpath, render, history, out_base, verbose, jobs, cache, prof, solver, collapse_over)
+    finally:
+        if traced_here:
+            tracemalloc.stop()
+    if profile:
+        outprof = summary['out_base'] + '_profile.json'
+        with open(outprof, 'w') as f:
+            json.dump(dict(prof.to_dict(), file=cpath), f, indent=2)
+        if verbose:
+            print(f'Wrote profile to {outprof}')
+    del summary['out_base']
+    return summary
+
+
+def _analyze(cpath, render, history, out_base, verbose, jobs, cache, prof, solver, collapse_over):
+    with prof.phase('read'):
+        with open(cpath, 'r') as f:
+            code = f.read()
+    with prof.phase('preprocess'):
+        lines = crd.preprocess(code)
+    prof.count('lines', len(lines))
+    # the report's per-pass snapshots need a fresh solve: with a history, the
+    # cache is only written
+    units = crd.prepare_units(lines, cache if history == 'none' else None, prof)
+    next_def = 1 + sum(len(u['defs']) for u in units)
+
+    base = out_base if out_base is not None else os.path.splitext(os.path.basename(cpath))[0]
+    outdot = base + '_cfg.dot'
+    with prof.phase('write_dot'):
+        write_dot_units(units, outdot, verbose=verbose, collapse_over=collapse_over)
+    if render:
+        with prof.phase('render'):
+            render_many([(outdot, image_path(base, render))], jobs=1, verbose=verbose)
+
+    N = sum(u['metrics'][0] for u in units)
+    E = sum(u['metrics'][1] for u in units)
+    # E - N + 2P over the P disconnected function graphs
+    CC = sum(u['metrics'][2] for u in units)
+    if verbose:
+        for u in units:
+            print(f"  {u['name']}: N={u['metrics'][0]} E={u['metrics'][1]} CC={u['metrics'][2]}")
+        print('Metrics: N (nodes)=', N, 'E (edges)=', E, 'Cyclomatic Complexity =', CC)
+
+    todo = [k for k, u in enumerate(units) if 'in' not in u]
+    solved = {}
+    if jobs is not None and jobs > 1 and len(todo) > 1:
+        solved = crd.solve_units_parallel(units, todo, jobs, history, prof, solver)
+
+    outrep = base + '_reaching.txt'
+    passes = evaluations = set_ops = 0
+    solver_time = 0.0
+    with open(outrep, 'w') as f:
+        for k, u in enumerate(units):
+            blocks = u['blocks']
+            fmt = crd.make_set_formatter(u['def_ids'])
+            with prof.phase('write_report'):
+                if k:
+                    f.write('\n')
+                crd.write_unit_banner(f, u)
+                crd.write_report_header(f, u['defs'], u['gen'], u['kill'], blocks, fmt)
+            if 'in' in u:
+                in_sets, out_sets, stats, secs = u['in'], u['out'], u['stats'], 0.0
+                f.write('(cached result: iterations not recorded)\n\n')
+            elif k in solved:
+                in_sets, out_sets, hist, stats, secs = solved[k]
+                with prof.phase('write_report'):
+                    for snap in hist:
+                        crd.write_report_pass(f, snap, blocks, fmt)
+            else:
+                # stream snapshots into the report instead of materializing the history;
+                # the 'solve' phase therefore includes writing the snapshots
+                with prof.phase('solve'):
+                    in_sets, out_sets, _, stats, secs = crd.solve_unit(
+                        u, history=history, on_pass=lambda snap: crd.write_report_pass(f, snap, blocks, fmt),
+                        solver=solver)
+            if cache is not None and 'in' not in u:
+                with prof.phase('cache_store'):
+                    cache.store(u['unit'], u, in_sets, out_sets, stats)
+            with prof.phase('write_report'):
+                crd.write_report_footer(f, blocks, in_sets, out_sets, fmt, stats)
+            passes += stats['passes']
+            evaluations += stats['evaluations']
+            set_ops += stats.get('set_ops', 0)
+            solver_time += secs
+    if cache is not None:
+        with prof.phase('cache_evict'):
+            cache.evict()
+    n_cached = len(units) - len(todo)
+    for name, n in (('units', len(units)), ('cached_units', n_cached), ('blocks', N), ('edges', E),
+                    ('definitions', next_def - 1), ('solver_passes', passes),
+                    ('block_evaluations', evaluations), ('set_operations', set_ops)):
+        prof.count(name, n)
+    if verbose:
+        print('Solver: passes =', passes, 'block evaluations =', evaluations)
+        if cache is not None:
+            print(f'Cache: {n_cached}/{len(units)} units reused')
+        print(f'Wrote reaching definitions report to {outrep}')
+        print('\nDone.\n')
+    return {
+        'file': cpath,
+        'functions': sum(1 for u in units if u['name'] != crd.GLOBAL_UNIT),
+        'cached': n_cached,
+        'nodes': N,
+        'edges': E,
+        'cyclomatic': CC,
+        'definitions': next_def - 1,
+        'passes': passes,
+        'evaluations': evaluations,
+        'solver_time': round(solver_time, 6),
+        'out_base': base,
+    }
+
+
+# ----------------- Batch mode -----------------
+
+C_EXTENSIONS = ('.c',)
+SUMMARY_FIELDS = ['file', 'functions', 'cached', 'nodes', 'edges', 'cyclomatic', 'definitions',
+                  'passes', 'evaluations', 'solver_time', 'error']
+
+
+def collect_c_files(target):
+    """Expand a directory (recursively) or a glob pattern into (root, files).
+    root is the directory that output paths are mirrored from."""
+    if os.path.isdir(target):
+        files = []
+        for dirpath, dirnames, filenames in os.walk(target):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith(C_EXTENSIONS):
+                    files.append(os.path.join(dirpath, name))
+        return target, files
+    files = sorted(p for p in glob.glob(target, recursive=True)
+                   if os.path.isfile(p) and p.endswith(C_EXTENSIONS))
+    if not files:
+        return '.', []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in files])
+    return root, files
+
+
+def mirrored_base(cpath, root, outdir):
+    # keep the relative directory so that a/x.c and b/x.c do not collide
+    rel = os.path.relpath(os.path.abspath(cpath), os.path.abspath(root))
+    return os.path.join(outdir, os.path.splitext(rel)[0])
+
+
+def _analyze_job(job):
+    # runs in a worker process; never raise so one bad file doesn't stop the batch
+    cpath, out_base, history, cache, profile, solver, collapse_over = job
+    try:
+        os.makedirs(os.path.dirname(out_base) or '.', exist_ok=True)
+        return analyze_c_file(cpath, history=history, out_base=out_base, verbose=False,
+                              cache=cache, profile=profile, solver=solver, collapse_over=collapse_over)
+    except Exception as e:
+        return {'file': cpath, 'error': f'{type(e).__name__}: {e}'}
+
+
+def analyze_tree(target, outdir, jobs=None, render=False, history='full', cache=None, profile=False,
+                 solver='dense', collapse_over=COLLAPSE_BLOCKS, render_jobs=None):
+    """Analyze every .c file under a directory / matching a glob with a process
+    pool. Outputs are written under outdir mirroring the source layout.
+    Rendering (render: False or an image format) runs as a separate stage
+    after the analysis, with at most render_jobs concurrent dot processes.
+    Returns the list of per-file summaries (in input order)."""
+    root, files = collect_c_files(target)
+    if not files:
+        print(f'No .c files found for {target}')
+        return []
+    # workers only read/write the cache; eviction happens once at the end
+    worker_cache = AnalysisCache(cache.cache_dir, max_bytes=None) if cache is not None else None
+    job_list = [(p, mirrored_base(p, root, outdir), history, worker_cache, profile, solver, collapse_over)
+                for p in files]
+    results = [None] * len(job_list)
+    total = len(job_list)
+    done = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(_analyze_job, job): k for k, job in enumerate(job_list)}
+        for fut in as_completed(futures):
+            res = fut.result()
+            results[futures[fut]] = res
+            done += 1
+            if 'error' in res:
+                failed += 1
+            print(f'\r[{done}/{total}] analyzed, {failed} failed', end='', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    if cache is not None:
+        cache.evict()
+    if render:
+        pairs = [(job[1] + '_cfg.dot', image_path(job[1], render))
+                 for job, res in zip(job_list, results) if 'error' not in res]
+        counts = render_many(pairs, jobs=render_jobs, verbose=False)
+        print(f"Rendered {counts['rendered']} image(s), {counts['skipped']} up to date, "
+              f"{counts['failed']} failed", file=sys.stderr)
+    return results
+
+
+def write_summary(results, path):
+    """Write batch summaries as CSV (if path ends in .csv) or JSON."""
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            for res in results:
+                writer.writerow(res)
+    else:
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f'Wrote summary for {len(results)} files to {path}')
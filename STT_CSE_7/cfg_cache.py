@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict, defaultdict
+
+import cfg_reaching_definitions as crd
+
+
+# ----------------- Incremental cache -----------------
+# Results are cached per unit (function), keyed by a hash of the unit's
+# preprocessed text and TOOL_VERSION. Entries are stored in unit-local
+# coordinates (lines relative to the unit start, blocks/definitions numbered
+# from 0) so a function that merely moved in the file is still a hit.
+
+def unit_cache_key(unit):
+    h = hashlib.sha256(f"{crd.TOOL_VERSION}\0{unit['name']}\0".encode())
+    for ln in unit['lines'][unit['start']:unit['end']+1]:
+        h.update(ln.encode('utf-8', 'surrogatepass'))
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+def encode_unit(u, in_sets, out_sets, stats):
+    """JSON-serializable, unit-local form of a solved unit."""
+    s = u['start']
+    local = {bid: k for k, bid in enumerate(u['blocks'])}
+    order = list(u['blocks'])
+    return {
+        'version': crd.TOOL_VERSION,
+        'blocks': [[info['start'] - s, info['end'] - s, [[i - s, ln] for i, ln in info['lines']]]
+                   for info in u['blocks'].values()],
+        'edges': [[local[a], local[b], lab] for a, b, lab in u['edges']],
+        'defs': [[m['var'], local[m['block']], m['line_idx'] - s, m['text']] for m in u['defs'].values()],
+        'gen': [u['gen'][bid] for bid in order],
+        'kill': [u['kill'][bid] for bid in order],
+        'in': [in_sets[bid] for bid in order],
+        'out': [out_sets[bid] for bid in order],
+        'stats': stats,
+    }
+
+
+def decode_unit(data, unit, first_bid=0, first_def=1):
+    """Inverse of encode_unit, renumbered for the unit's current position."""
+    s = unit['start']
+    order = [f'B{first_bid + k}' for k in range(len(data['blocks']))]
+    blocks = OrderedDict()
+    for bid, (start, end, block_lines) in zip(order, data['blocks']):
+        blocks[bid] = {'start': start + s, 'end': end + s,
+                       'lines': [(i + s, ln) for i, ln in block_lines]}
+    edges = [(order[a], order[b], lab) for a, b, lab in data['edges']]
+    defs = OrderedDict()
+    vmap = defaultdict(list)
+    for k, (var, blk, line_idx, text) in enumerate(data['defs']):
+        did = f'D{first_def + k}'
+        defs[did] = {'var': var, 'block': order[blk], 'line_idx': line_idx + s, 'text': text}
+        vmap[var].append(did)
+    return {
+        'name': unit['name'],
+        'start': unit['start'],
+        'end': unit['end'],
+        'blocks': blocks,
+        'edges': edges,
+        'adjacency': crd.build_adjacency(blocks, edges),
+        'metrics': crd.compute_metrics(blocks, edges),
+        'defs': defs,
+        'var_map': vmap,
+        'def_ids': list(defs),
+        'gen': dict(zip(order, data['gen'])),
+        'kill': dict(zip(order, data['kill'])),
+        'in': dict(zip(order, data['in'])),
+        'out': dict(zip(order, data['out'])),
+        'stats': data['stats'],
+    }
+
+
+class AnalysisCache:
+    """On-disk cache of solved units: one JSON file per key, LRU by mtime,
+    evicted down to max_bytes (never evicted if max_bytes is None)."""
+
+    def __init__(self, cache_dir='.cfg_cache', max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def load(self, unit, first_bid=0, first_def=1):
+        """Decoded unit for a cache hit, or None."""
+        path = self._path(unit_cache_key(unit))
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != crd.TOOL_VERSION:
+            return None
+        return decode_unit(data, unit, first_bid, first_def)
+
+    def store(self, unit, u, in_sets, out_sets, stats):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = encode_unit(u, in_sets, out_sets, stats)
+        # write-then-rename so concurrent batch workers never see partial files
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, self._path(unit_cache_key(unit)))
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        entries.sort()
+        for mtime, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,78 @@
+# Thin client for cfg_daemon.py: one JSON request per line over a Unix socket.
+# Kept to socket/json/os/sys so that a query costs little more than interpreter
+# startup; all analysis happens in the warm daemon.
+#
+#   python cfg_client.py open file=prog1.c
+#   python cfg_client.py reaching file=prog1.c line=40 var=count
+#   python cfg_client.py metrics file=prog1.c
+#
+# Values that look like integers are sent as integers.
+
+import json
+import os
+import socket
+import sys
+
+# tempfile.gettempdir() would cost more to import than the rest of the client
+DEFAULT_SOCKET = os.path.join(os.environ.get('TMPDIR') or '/tmp', f'cfg_daemon-{os.getuid()}.sock')
+
+
+class NoReply(Exception):
+    """The daemon closed the connection without a complete reply."""
+
+
+def request(req, sock_path=DEFAULT_SOCKET, timeout=60.0):
+    """Send one request dict and return the decoded response dict.
+    Raises NoReply if the daemon closes the connection without a complete
+    reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(sock_path)
+        s.sendall(json.dumps(req).encode() + b'\n')
+        buf = b''
+        while not buf.endswith(b'\n'):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+    if not buf.endswith(b'\n'):
+        raise NoReply('the daemon closed the connection without a reply'
+                      if not buf else 'the daemon closed the connection mid-reply')
+    return json.loads(buf)
+
+
+def parse_args(argv):
+    sock_path = DEFAULT_SOCKET
+    if len(argv) >= 2 and argv[0] == '--socket':
+        sock_path, argv = argv[1], argv[2:]
+    if not argv:
+        raise ValueError('usage: cfg_client.py [--socket PATH] OP [key=value ...]')
+    req = {'op': argv[0]}
+    for arg in argv[1:]:
+        key, sep, value = arg.partition('=')
+        if not sep:
+            raise ValueError(f'expected key=value, got {arg!r}')
+        req[key] = int(value) if value.lstrip('-').isdigit() else value
+    if 'file' in req:
+        # the daemon may run in another directory
+        req['file'] = os.path.abspath(req['file'])
+    return sock_path, req
+
+
+if __name__ == '__main__':
+    try:
+        sock_path, req = parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    try:
+        resp = request(req, sock_path)
+    except (NoReply, ValueError) as e:
+        # connected, but the daemon died or garbled its reply
+        print(f'no usable reply from daemon at {sock_path}: {e}', file=sys.stderr)
+        sys.exit(2)
+    except OSError as e:
+        print(f'cannot reach daemon at {sock_path}: {e}', file=sys.stderr)
+        sys.exit(2)
+    print(json.dumps(resp.get('result') if resp.get('ok') else resp, indent=1))
+    sys.exit(0 if resp.get('ok') else 1)
@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import cfg_api
+import cfg_cache
+import cfg_reaching_definitions as crd
+from cfg_client import DEFAULT_SOCKET
+
+
+# ----------------- Warm analysis state -----------------
+# The daemon keeps one AnalysisResult per watched file. A file is re-analyzed
+# when its (mtime, size) stamp changes, and even then only the functions whose
+# text changed are recomputed: solved units are kept in an in-memory cache
+# with the same interface as cfg_cache.AnalysisCache.
+
+class MemoryCache:
+    """In-process counterpart of cfg_cache.AnalysisCache (LRU by entry count),
+    shared by analyses running in different threads."""
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def load(self, unit, first_bid=0, first_def=1):
+        key = cfg_cache.unit_cache_key(unit)
+        with self.lock:
+            data = self.entries.get(key)
+            if data is None:
+                return None
+            self.entries.move_to_end(key)
+        return cfg_cache.decode_unit(data, unit, first_bid, first_def)
+
+    def store(self, unit, u, in_sets, out_sets, stats):
+        key = cfg_cache.unit_cache_key(unit)
+        data = cfg_cache.encode_unit(u, in_sets, out_sets, stats)
+        with self.lock:
+            self.entries[key] = data
+            self.entries.move_to_end(key)
+
+    def evict(self):
+        with self.lock:
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def file_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class Workspace:
+    """Analyzed files by absolute path.
+
+    self.lock guards the file table and is only held to read or install
+    entries. Analyses run under a per-file lock, so re-analyzing one large
+    file never blocks requests about other files (or ping).
+    """
+
+    def __init__(self, solver='dense', cache=None):
+        self.solver = solver
+        self.cache = cache if cache is not None else MemoryCache()
+        self.files = {}
+        self.file_locks = {}
+        self.failed = {}    # path -> stamp whose analysis raised, so refresh does not retry it
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """Entry for path, (re-)analyzing it if it is new or changed on disk."""
+        path = os.path.abspath(path)
+        with self.lock:
+            file_lock = self.file_locks.setdefault(path, threading.Lock())
+        # concurrent requests for the same changed file wait for one analysis
+        with file_lock:
+            stamp = file_stamp(path)
+            with self.lock:
+                entry = self.files.get(path)
+            if entry is None or entry['stamp'] != stamp:
+                entry = self._analyze(path, stamp)
+                with self.lock:
+                    self.files[path] = entry
+            return entry
+
+    def _analyze(self, path, stamp):
+        t0 = time.perf_counter()
+        result = cfg_api.analyze_file(path, cache=self.cache, solver=self.solver)
+        return {'stamp': stamp, 'result': result, 'chains': None, 'chains_lock': threading.Lock(),
+                'seconds': time.perf_counter() - t0, 'analyzed_at': time.time()}
+
+    def chains(self, entry):
+        # built on first use: most editor queries never need them
+        with entry['chains_lock']:
+            if entry['chains'] is None:
+                entry['chains'] = cfg_api.build_chains(entry['result'])
+            return entry['chains']
+
+    def entries(self):
+        """Snapshot of (path, entry) pairs, sorted by path."""
+        with self.lock:
+            return sorted(self.files.items())
+
+    def close(self, path):
+        path = os.path.abspath(path)
+        with self.lock:
+            self.file_locks.pop(path, None)
+            self.failed.pop(path, None)
+            return self.files.pop(path, None) is not None
+
+    def refresh(self, on_error=None):
+        """Re-analyze watched files that changed; forget deleted ones.
+        A file that cannot be read or analyzed keeps its previous entry and
+        is reported once per change through on_error(path, exception).
+        Returns the paths that were re-analyzed."""
+        changed = []
+        for path, entry in self.entries():
+            try:
+                stamp = file_stamp(path)
+            except OSError:
+                self.close(path)
+                continue
+            if stamp == entry['stamp'] or self.failed.get(path) == stamp:
+                continue
+            try:
+                self.get(path)
+            except Exception as e:
+                self.failed[path] = stamp
+                if on_error is not None:
+                    on_error(path, e)
+                continue
+            self.failed.pop(path, None)
+            changed.append(path)
+        return changed
+
+
+def log_error(path, e):
+    print(f'cannot analyze {path}: {type(e).__name__}: {e}', file=sys.stderr, flush=True)
+
+
+def watch(ws, interval, stop, verbose=True):
+    # stat polling keeps the daemon dependency-free; a changed file is
+    # re-analyzed here so the next query finds it warm
+    while not stop.wait(interval):
+        for path in ws.refresh(on_error=log_error):
+            if verbose:
+                print(f're-analyzed {path}', flush=True)
+
+
+# ----------------- Request handlers -----------------
+# Protocol: one JSON object per line, {"op": ..., ...}; each request gets one
+# JSON line back, {"ok": true, "result": ...} or {"ok": false, "error": ...}.
+# Line numbers are 0-based preprocessed lines, as in the reports and --query.
+
+def _summary(path, entry):
+    result = entry['result']
+    N, E, CC = result.metrics()
+    return {'file': path, 'functions': len(result.functions),
+            'cached': sum(1 for fn in result.functions if fn.cached),
+            'nodes': N, 'edges': E, 'cyclomatic': CC,
+            'seconds': round(entry['seconds'], 6), 'analyzed_at': entry['analyzed_at']}
+
+
+def op_ping(ws, req):
+    return {'pid': os.getpid(), 'files': len(ws.files), 'solver': ws.solver}
+
+
+def op_open(ws, req):
+    path = os.path.abspath(req['file'])
+    return _summary(path, ws.get(path))
+
+
+def op_close(ws, req):
+    return {'closed': ws.close(req['file'])}
+
+
+def op_files(ws, req):
+    return [_summary(path, entry) for path, entry in ws.entries()]
+
+
+def op_metrics(ws, req):
+    result = ws.get(req['file'])['result']
+    N, E, CC = result.metrics()
+    functions = []
+    for fn in result.functions:
+        n, e, cc = fn.metrics()
+        functions.append({'name': fn.name, 'start': fn.start, 'end': fn.end,
+                          'nodes': n, 'edges': e, 'cyclomatic': cc})
+    return {'nodes': N, 'edges': E, 'cyclomatic': CC, 'functions': functions}
+
+
+def op_cfg(ws, req):
+    result = ws.get(req['file'])['result']
+    out = []
+    for fn in result.functions:
+        if req.get('function') not in (None, fn.name):
+            continue
+        out.append({'name': fn.name, 'start': fn.start, 'end': fn.end,
+                    'blocks': [{'id': f'B{b.id}', 'start': b.start, 'end': b.end, 'lines': list(b.lines)}
+                               for b in fn.blocks],
+                    'edges': [[f'B{s}', f'B{d}', lab] for s, d, lab in fn.edges]})
+    return out
+
+
+def op_block(ws, req):
+    # reaching definitions at entry/exit of the block containing a line
+    result = ws.get(req['file'])['result']
+    hit = result.block_at(int(req['line']))
+    if hit is None:
+        return None
+    fn, block = hit
+    return {'function': fn.name, 'block': f'B{block.id}', 'start': block.start, 'end': block.end,
+            'in': [f'D{d.id}' for d in fn.reaching_in(block.id)],
+            'out': [f'D{d.id}' for d in fn.reaching_out(block.id)]}
+
+
+def op_reaching(ws, req):
+    entry = ws.get(req['file'])
+    chains = ws.chains(entry)
+    return cfg_api.answer_queries(entry['result'], chains, [(int(req['line']), req['var'])])[0]
+
+
+def op_shutdown(ws, req):
+    return {'stopping': True}
+
+
+OPS = {
+    'ping': op_ping,
+    'open': op_open,
+    'close': op_close,
+    'files': op_files,
+    'metrics': op_metrics,
+    'cfg': op_cfg,
+    'block': op_block,
+    'reaching': op_reaching,
+    'shutdown': op_shutdown,
+}
+
+
+def handle(ws, line):
+    """One request line -> one response dict."""
+    try:
+        req = json.loads(line)
+        handler = OPS.get(req.get('op'))
+        if handler is None:
+            return {'ok': False, 'error': f"unknown op {req.get('op')!r}; expected one of {sorted(OPS)}"}
+        return {'ok': True, 'result': handler(ws, req)}
+    except KeyError as e:
+        return {'ok': False, 'error': f'missing field {e}'}
+    except Exception as e:
+        return {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+
+
+# ----------------- Server -----------------
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # a connection may carry any number of requests
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            resp = handle(self.server.workspace, line)
+            self.wfile.write(json.dumps(resp).encode() + b'\n')
+            self.wfile.flush()
+            if resp.get('ok') and json.loads(line).get('op') == 'shutdown':
+                # shutdown() blocks until serve_forever returns: call it elsewhere
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def claim_socket(sock_path):
+    """Remove a stale socket file; refuse if a daemon is still listening."""
+    if not os.path.exists(sock_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(sock_path)
+        except OSError:
+            os.remove(sock_path)
+            return
+    raise RuntimeError(f'a daemon is already listening on {sock_path}')
+
+
+def serve(sock_path=DEFAULT_SOCKET, files=(), interval=1.0, solver='dense', verbose=True):
+    ws = Workspace(solver=solver)
+    for path in files:
+        entry = ws.get(path)
+        if verbose:
+            print(f"analyzed {path} in {entry['seconds'] * 1000:.1f} ms", flush=True)
+    claim_socket(sock_path)
+    server = DaemonServer(sock_path, RequestHandler)
+    server.workspace = ws
+    os.chmod(sock_path, 0o600)
+    stop = threading.Event()
+    watcher = threading.Thread(target=watch, args=(ws, interval, stop, verbose), daemon=True)
+    watcher.start()
+    if verbose:
+        print(f'listening on {sock_path}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        try:
+            os.remove(sock_path)
+        except OSError:
+            pass
+    if verbose:
+        print('daemon stopped')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Warm analysis daemon: keeps CFGs and reaching definitions in memory, re-analyzes '
+                    'changed files and answers JSON queries over a Unix socket (see cfg_client.py)')
+    parser.add_argument('files', nargs='*', help='.c files to analyze and watch at startup')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between file change checks')
+    parser.add_argument('--solver', choices=crd.SOLVERS, default='dense', help='Reaching-definitions solver')
+    parser.add_argument('--quiet', action='store_true', help='Do not log analyses')
+    args = parser.parse_args()
+    serve(args.socket, args.files, args.interval, args.solver, verbose=not args.quiet)
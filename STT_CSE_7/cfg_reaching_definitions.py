@@ -1,10 +1,18 @@
-
 import re
-import sys
 import argparse
 import os
-import subprocess
+import json
+import time
+import heapq
+import bisect
+import tracemalloc
+import cProfile
+from contextlib import contextmanager
 from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# bump whenever parsing or analysis changes, so cached results are invalidated
+TOOL_VERSION = '2.1'
 
 
 def remove_block_comments(code: str) -> str:
@@ -20,38 +28,91 @@ def remove_line_comments(code: str) -> str:
 def preprocess(code: str) -> list:
     code = remove_block_comments(code)
     code = remove_line_comments(code)
-    # Split into lines and keep original indentation-trimmed form
-    lines = [ln.rstrip() for ln in code.splitlines()]
+    # Split into lines and keep original indentation-trimmed form. Only '\n'
+    # ends a line, as for compilers and scanners (splitlines() would also
+    # break on form feeds and other separators and shift the numbering)
+    raw = code.split('\n')
+    if raw[-1] == '':
+        raw.pop()
+    lines = [ln.rstrip() for ln in raw]
     # Keep empty lines (we will ignore them later for leaders but keep indexing stable)
     return lines
 
 
-def next_non_empty(lines, idx):
-    i = idx + 1
-    while i < len(lines) and lines[i].strip() == "":
-        i += 1
-    return i if i < len(lines) else None
+def source_line_map(code: str) -> list:
+    """For each 0-based line of the original source, the preprocess line it
+    ends up on. Removing a block comment joins the lines it spans, so those
+    all map to the line where the comment starts. Lines are counted by '\n',
+    as in preprocess."""
+    n = code.count('\n') + 1
+    pre = []
+    shift = 0       # newlines removed so far
+    cur = pos = 0   # source line of pos
+    for m in re.finditer(r"/\*.*?\*/", code, flags=re.S):
+        first = cur + code.count('\n', pos, m.start())
+        k = code.count('\n', m.start(), m.end())
+        pre.extend(i - shift for i in range(len(pre), first))
+        pre.extend([first - shift] * (first + k + 1 - len(pre)))
+        shift += k
+        cur, pos = first + k, m.end()
+    pre.extend(i - shift for i in range(len(pre), n))
+    return pre
+
 
+# string or char literal (contents may contain braces, semicolons, ...)
+LITERAL_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+CONTROL_RE = re.compile(r'^(if|for|while|do)\b')
+JUMP_RE = re.compile(r'\b(return|goto|break|continue)\b')
+LOOKAHEAD = 50
 
-def find_matching_brace(lines, start_idx):
+
+def blank_literal(m):
+    # keep the quotes and the column positions, drop the contents
+    lit = m.group(0)
+    return lit[0] + ' ' * (len(lit) - 2) + lit[-1]
+
+
+def scan_lines(lines):
     """
-    Given lines and an index start_idx, find the line index of the matching closing brace '}'
-    assuming the opening brace '{' is somewhere on or after start_idx.
-    Returns the index of the line containing the matching '}', or None if not found.
+    Single lexer pass over the output of preprocess.
+    Returns (code, next_ne, brace_match):
+      - code[i]: line i stripped, with string/char literal contents blanked
+      - next_ne[i]: index of the next non-empty line after i (or None)
+      - brace_match[i]: for a line containing '{', the first line at or after i
+        where the brace balance counted from the start of line i returns to
+        zero (the line of the matching '}'), or None if unbalanced
     """
-    balance = 0
-    found_any = False
-    for i in range(start_idx, len(lines)):
-        ln = lines[i]
-        # Count braces
-        for ch in ln:
-            if ch == '{':
-                balance += 1
-                found_any = True
-            elif ch == '}':
-                balance -= 1
-        if found_any and balance == 0:
-            return i
+    n = len(lines)
+    code = [LITERAL_RE.sub(blank_literal, ln.strip()) if ('"' in ln or "'" in ln) else ln.strip()
+            for ln in lines]
+    # depth[i] = brace depth before line i
+    depth = [0] * (n + 1)
+    for i, ln in enumerate(code):
+        depth[i+1] = depth[i] + ln.count('{') - ln.count('}')
+
+    next_ne = [None] * n
+    brace_match = [None] * n
+    nxt = None
+    # last_at_depth[d] = smallest line j >= i whose end-of-line depth is d
+    last_at_depth = {}
+    for i in range(n - 1, -1, -1):
+        next_ne[i] = nxt
+        if code[i] != "":
+            nxt = i
+        last_at_depth[depth[i+1]] = i
+        if '{' in code[i]:
+            brace_match[i] = last_at_depth.get(depth[i])
+    return code, next_ne, brace_match
+
+
+def find_body_open(code, start, n):
+    """Line of the '{' opening the body of a construct at `start`, or None for a
+    single-statement body (a ';' is reached first)."""
+    for j in range(start, min(n, start + LOOKAHEAD)):
+        if '{' in code[j]:
+            return j
+        if ';' in code[j] and j > start:
+            return None
     return None
 
 
@@ -69,47 +130,39 @@ def find_leaders_and_controls(lines):
     leaders = set()
     controls = []
     n = len(lines)
+    code, next_ne, brace_match = scan_lines(lines)
 
     # Rule: first instruction is a leader -> find first non-empty
-    first = None
-    for i, ln in enumerate(lines):
-        if ln.strip() != "":
-            first = i
+    for i, ln in enumerate(code):
+        if ln != "":
             leaders.add(i)
             break
 
     i = 0
     while i < n:
-        ln = lines[i].strip()
+        ln = code[i]
         if ln == "":
             i += 1
             continue
 
-        # Detect 'if' / 'for' / 'while' / 'do' at start of line (heuristic)
-        if re.match(r'^(if|for|while)\b', ln):
-            typ = re.match(r'^(if|for|while)\b', ln).group(1)
+        m = CONTROL_RE.match(ln)
+        # Detect 'if' / 'for' / 'while' at start of line (heuristic)
+        if m and m.group(1) != 'do':
+            typ = m.group(1)
             cond_line = i
 
             # Find start of body: look for '{' from the condition line onwards
-            body_open_line = None
-            for j in range(i, min(n, i+50)):    
-                if '{' in lines[j]:
-                    body_open_line = j
-                    break
-                # if we reach a semicolon on the same line and no '{', it's a single-statement body
-                if ';' in lines[j] and j > i:
-                    break
-
+            body_open_line = find_body_open(code, i, n)
             if body_open_line is not None:
-                then_start = next_non_empty(lines, body_open_line)
+                then_start = next_ne[body_open_line]
                 if then_start is None:
                     then_start = body_open_line
-                then_end = find_matching_brace(lines, body_open_line)
+                then_end = brace_match[body_open_line]
                 if then_end is None:
                     then_end = body_open_line
             else:
                 # Single-statement: take next non-empty line
-                then_start = next_non_empty(lines, i)
+                then_start = next_ne[i]
                 then_end = then_start
 
             # Look for 'else' after then_end
@@ -118,29 +171,23 @@ def find_leaders_and_controls(lines):
             join = None
             after_then = None
             if then_end is not None:
-                after_then = next_non_empty(lines, then_end)
-            if after_then is not None and lines[after_then].strip().startswith('else'):
+                after_then = next_ne[then_end]
+            if after_then is not None and code[after_then].startswith('else'):
                 # process else
                 k = after_then
                 # If 'else if' -> we'll treat else as another if (nested)
                 # find body as with if
-                body_open_else = None
-                for j in range(k, min(n, k+50)):
-                    if '{' in lines[j]:
-                        body_open_else = j
-                        break
-                    if ';' in lines[j] and j > k:
-                        break
+                body_open_else = find_body_open(code, k, n)
                 if body_open_else is not None:
-                    else_start = next_non_empty(lines, body_open_else)
-                    else_end = find_matching_brace(lines, body_open_else)
+                    else_start = next_ne[body_open_else]
+                    else_end = brace_match[body_open_else]
                     if else_end is None:
                         else_end = body_open_else
-                    join = next_non_empty(lines, else_end)
+                    join = next_ne[else_end]
                 else:
-                    else_start = next_non_empty(lines, k)
+                    else_start = next_ne[k]
                     else_end = else_start
-                    join = next_non_empty(lines, else_end)
+                    join = next_ne[else_end] if else_end is not None else None
             else:
                 # No else: join is the next non-empty after then_end
                 join = after_then
@@ -174,20 +221,18 @@ def find_leaders_and_controls(lines):
             continue
 
         # detect do/while: 'do' starts then 'while' after
-        if re.match(r'^do\b', ln):
-            typ = 'do'
+        if m:
             cond_line = i
-            # find matching 'while' after a closing brace or semicolon
             # find the index of the line which contains 'while' that closes the do-while
-            # simple heuristic: search next 50 lines for a line starting with 'while' or containing ') ;'
+            # simple heuristic: search the next lines for a line starting with 'while' or containing ') ;'
             end_line = None
-            for j in range(i, min(n, i+100)):
-                if re.match(r'^while\b', lines[j].strip()) or (')' in lines[j] and ';' in lines[j]):
+            for j in range(i, min(n, i + 2 * LOOKAHEAD)):
+                if code[j].startswith('while') and CONTROL_RE.match(code[j]) or (')' in code[j] and ';' in code[j]):
                     end_line = j
                     break
-            then_start = next_non_empty(lines, i)
+            then_start = next_ne[i]
             then_end = end_line
-            join = next_non_empty(lines, end_line) if end_line is not None else None
+            join = next_ne[end_line] if end_line is not None else None
             leaders.add(i)
             if then_start is not None:
                 leaders.add(then_start)
@@ -207,29 +252,33 @@ def find_leaders_and_controls(lines):
 
         # Also: any instruction that comes immediately after a branch/jump/loop is a leader.
         # We partly covered that with 'join' detection above. To be conservative, if line includes 'return' or 'goto' or 'break' or 'continue', mark next non-empty as leader.
-        if re.search(r'\b(return|goto|break|continue)\b', ln):
-            nx = next_non_empty(lines, i)
+        if JUMP_RE.search(ln):
+            nx = next_ne[i]
             if nx is not None:
                 leaders.add(nx)
 
         i += 1
 
     # final adjustment: ensure leaders are sorted and within range
-    leaders = set([i for i in leaders if i is not None and 0 <= i < n and lines[i].strip() != ""])
+    leaders = set([i for i in leaders if i is not None and 0 <= i < n and code[i] != ""])
     return leaders, controls
 
 
-def build_basic_blocks(lines, leaders_set):
+def build_basic_blocks(lines, leaders_set, first_bid=0, last_line=None):
+    # first_bid / last_line let several functions of one file share the line
+    # numbering while getting distinct block IDs
     leaders = sorted(list(leaders_set))
+    if last_line is None:
+        last_line = len(lines) - 1
     blocks = OrderedDict()
     # map start_line -> block_id
     start_to_bid = {}
     for idx, s in enumerate(leaders):
-        bid = f'B{idx}'
+        bid = f'B{first_bid + idx}'
         start_to_bid[s] = bid
     # Determine block ranges: each leader spans until just before next leader
     for idx, s in enumerate(leaders):
-        end = leaders[idx+1]-1 if idx+1 < len(leaders) else len(lines)-1
+        end = leaders[idx+1]-1 if idx+1 < len(leaders) else last_line
         # Trim leading/trailing blank lines
         block_lines = []
         for i in range(s, end+1):
@@ -248,9 +297,36 @@ def find_block_by_line(start_to_bid, line_idx):
     return start_to_bid.get(line_idx, None)
 
 
+def build_line_index(blocks):
+    """Sorted (starts, ends, bids) arrays for bisect-based line -> block lookups."""
+    order = sorted(blocks.items(), key=lambda kv: kv[1]['start'])
+    starts = [info['start'] for bid, info in order]
+    ends = [info['end'] for bid, info in order]
+    bids = [bid for bid, info in order]
+    return starts, ends, bids
+
+
+def block_containing(line_index, line_idx):
+    """Block ID whose [start, end] range contains line_idx, or None."""
+    starts, ends, bids = line_index
+    k = bisect.bisect_right(starts, line_idx) - 1
+    if k >= 0 and line_idx <= ends[k]:
+        return bids[k]
+    return None
+
+
 def build_cfg_edges(blocks, start_to_bid, controls):
-    # edges: list of (src_bid, dst_bid, label)
+    # edges: list of (src_bid, dst_bid, label), kept in insertion order;
+    # `seen` makes duplicate checks O(1)
     edges = []
+    seen = set()
+
+    def add_edge(src, dst, lab):
+        key = (src, dst, lab)
+        if key not in seen:
+            seen.add(key)
+            edges.append(key)
+
     # Create a quick mapping from start_line to bid
     start_line_to_bid = {info['start']: bid for bid, info in blocks.items()}
 
@@ -265,7 +341,6 @@ def build_cfg_edges(blocks, start_to_bid, controls):
 
     for bid, info in blocks.items():
         s = info['start']
-        e = info['end']
         # If this block is a condition block (one of our control cond_lines)
         if s in control_by_cond:
             c = control_by_cond[s]
@@ -273,38 +348,30 @@ def build_cfg_edges(blocks, start_to_bid, controls):
             if c['then_start'] is not None:
                 th_bid = start_line_to_bid.get(c['then_start'])
                 if th_bid:
-                    edges.append((bid, th_bid, 'true'))
+                    add_edge(bid, th_bid, 'true')
             # False branch -> else_start if present else join
             if c['else_start'] is not None:
                 el_bid = start_line_to_bid.get(c['else_start'])
                 if el_bid:
-                    edges.append((bid, el_bid, 'false'))
+                    add_edge(bid, el_bid, 'false')
                 # connect both branches to join later
             else:
                 # false edge to join
                 if c['join'] is not None:
                     j_bid = start_line_to_bid.get(c['join'])
                     if j_bid:
-                        edges.append((bid, j_bid, 'false'))
-            # Additionally, if join exists, ensure then and else connect to join
-            if c['join'] is not None:
-                # find block ids for ends of then and else and connect to join where appropriate
-                join_bid = start_line_to_bid.get(c['join'])
-                # then_end block id: find the block starting at or right after then_end
-                if c['then_end'] is not None:
-                    # the statement after then_end is the join, but we will add sequential edges below
-                    pass
+                        add_edge(bid, j_bid, 'false')
             # For loops, add back edges from body to cond
             if c['type'] in ('for', 'while', 'do'):
                 if c['then_start'] is not None:
                     body_bid = start_line_to_bid.get(c['then_start'])
                     if body_bid:
-                        edges.append((body_bid, bid, 'back'))
+                        add_edge(body_bid, bid, 'back')
                 # Condition -> exit (join)
                 if c['join'] is not None:
                     j_bid = start_line_to_bid.get(c['join'])
                     if j_bid:
-                        edges.append((bid, j_bid, 'exit'))
+                        add_edge(bid, j_bid, 'exit')
         else:
             # Not an explicit condition block -> sequential edge to next block if any
             # Find next block in starts after s
@@ -313,87 +380,157 @@ def build_cfg_edges(blocks, start_to_bid, controls):
                 next_start = starts[idx+1]
                 next_bid = start_line_to_bid.get(next_start)
                 if next_bid:
-                    edges.append((bid, next_bid, 'seq'))
+                    add_edge(bid, next_bid, 'seq')
 
     # Additional: ensure that blocks that represent bodies have edges to join if identified in controls
     # For each control structure, connect the last block inside then to join, and last block inside else to join
+    line_index = build_line_index(blocks)
     for c in controls:
         join = c.get('join')
         if join is None:
             continue
         join_bid = start_line_to_bid.get(join)
-        if c.get('then_end') is not None:
-            # find block that contains then_end (block with start <= then_end and end >= then_end)
-            for bid, info in blocks.items():
-                if info['start'] <= c['then_end'] <= info['end']:
-                    if join_bid and (bid, join_bid, '') not in edges:
-                        edges.append((bid, join_bid, 'seq'))
-                    break
-        if c.get('else_end') is not None:
-            for bid, info in blocks.items():
-                if info['start'] <= c['else_end'] <= info['end']:
-                    if join_bid and (bid, join_bid, '') not in edges:
-                        edges.append((bid, join_bid, 'seq'))
-                    break
-    # Deduplicate edges
+        if not join_bid:
+            continue
+        for end in (c.get('then_end'), c.get('else_end')):
+            if end is None:
+                continue
+            # block that contains the end of the branch (start <= end <= block end)
+            bid = block_containing(line_index, end)
+            if bid:
+                add_edge(bid, join_bid, 'seq')
+    return edges
+
+
+def build_adjacency(blocks, edges):
+    """Successor and predecessor lists (bid -> [bid], no duplicates), built once
+    from the edge list and shared by the ordering and the dataflow solver."""
+    succs = {bid: [] for bid in blocks}
+    preds = {bid: [] for bid in blocks}
     seen = set()
-    uniq = []
-    for a,b,l in edges:
-        key = (a,b,l)
-        if key not in seen:
-            seen.add(key)
-            uniq.append((a,b,l))
-    return uniq
-
-
-def write_dot(blocks, edges, outdot):
-    with open(outdot, 'w') as f:
-        f.write('digraph CFG {\n')
-        f.write('  node [shape=box, fontname="monospace"];\n')
-        for bid, info in blocks.items():
-            label_lines = [f'{bid}:']
-            if info['lines']:
-                for (ln_idx, ln) in info['lines']:
-                    # escape quotes and backslashes for DOT
-                    esc = ln.replace('\\', '\\\\').replace('"', '\\"')
-                    label_lines.append(f'{ln_idx}: {esc}')
-            else:
-                # Block has no lines, put "void"
-                label_lines.append('void')
-            label = '\\n'.join(label_lines)
-            f.write(f'  {bid} [label="{label}"];\n')
-        for src, dst, lab in edges:
-            if lab and lab != 'seq':
-                f.write(f'  {src} -> {dst} [label="{lab}"];\n')
-            else:
-                f.write(f'  {src} -> {dst};\n')
-        f.write('}\n')
-    print(f'Wrote DOT to {outdot}')
+    for src, dst, lab in edges:
+        if (src, dst) in seen:
+            continue
+        seen.add((src, dst))
+        succs[src].append(dst)
+        preds[dst].append(src)
+    return succs, preds
+
+
+# ---------- Per-function units ----------
+# Each function definition is analyzed as its own CFG. Everything at file scope
+# (globals, prototypes, type definitions) forms one extra '<global>' unit.
+
+FUNC_NAME_RE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*)\s*\(')
+# a typedef, or a struct/union/enum body with no parameter list before its '{'
+# ('struct node *make(int v) {' is a function returning a struct pointer)
+NON_FUNC_RE = re.compile(r'^(typedef\b|(struct|union|enum)\b[^(]*$)')
+GLOBAL_UNIT = '<global>'
+
+
+def split_functions(lines):
+    """
+    Find function definitions in the output of preprocess.
+    Returns a list of dicts {'name', 'start', 'end'} (inclusive line indices,
+    from the header line to the closing brace), in file order.
+    """
+    code, next_ne, brace_match = scan_lines(lines)
+    funcs = []
+    depth = 0
+    prev = []  # recent non-empty top-level lines, for headers split across lines
+    i = 0
+    n = len(code)
+    while i < n:
+        ln = code[i]
+        if depth == 0 and '{' in ln and brace_match[i] is not None:
+            head = ln[:ln.index('{')]
+            start = i
+            if '(' not in head:
+                # 'int main()\n{' or a parameter list over several lines
+                for j in reversed(prev[-10:]):
+                    if code[j].endswith((';', '}')):
+                        break
+                    if '(' in code[j]:
+                        start = j
+                        break
+                head = ' '.join(code[k] for k in range(start, i)) + ' ' + head
+            m = FUNC_NAME_RE.search(head)
+            if m and ')' in head and not NON_FUNC_RE.match(head.strip()) and '=' not in head[:m.start()]:
+                funcs.append({'name': m.group(1), 'start': start, 'end': brace_match[i]})
+                i = brace_match[i] + 1
+                prev = []
+                continue
+        if ln != "":
+            if depth == 0:
+                prev.append(i)
+            depth += ln.count('{') - ln.count('}')
+        i += 1
+    return funcs
+
 
+def build_units(lines):
+    """
+    Split a file into analysis units: one per function plus '<global>' for the
+    remaining file-scope lines. Each unit is {'name', 'start', 'end', 'lines'}
+    where 'lines' is the list to analyze (function lines blanked for '<global>').
+    """
+    funcs = split_functions(lines)
+    units = []
+    global_lines = list(lines)
+    for fn in funcs:
+        for k in range(fn['start'], fn['end'] + 1):
+            global_lines[k] = ''
+    if any(ln.strip() for ln in global_lines):
+        units.append({'name': GLOBAL_UNIT, 'start': 0, 'end': len(lines) - 1, 'lines': global_lines})
+    for fn in funcs:
+        units.append({'name': fn['name'], 'start': fn['start'], 'end': fn['end'], 'lines': lines})
+    return units
 
 
-def render_dot(dotfile, pngfile):
-    try:
-        subprocess.run(['dot', '-Tpng', dotfile, '-o', pngfile], check=True)
-        print(f'Rendered PNG to {pngfile}')
-    except Exception as e:
-        print('Could not render PNG automatically. Make sure Graphviz "dot" is installed and on PATH.')
-        print('You can manually run: dot -Tpng', dotfile, '-o', pngfile)
+def build_unit_cfg(unit, first_bid=0, prof=None):
+    """Blocks and edges for one unit; line indices stay file-global."""
+    prof = prof or Profiler()
+    lines = unit['lines']
+    s, e = unit['start'], unit['end']
+    sub = lines[s:e+1]
+    with prof.phase('leaders'):
+        leaders, controls = find_leaders_and_controls(sub)
+    prof.count('leaders', len(leaders))
+    if s:
+        leaders = {ld + s for ld in leaders}
+        for c in controls:
+            for key in ('cond_line', 'then_start', 'then_end', 'else_start', 'else_end', 'join'):
+                if c[key] is not None:
+                    c[key] += s
+    with prof.phase('blocks'):
+        blocks, start_to_bid = build_basic_blocks(lines, leaders, first_bid=first_bid, last_line=e)
+        if unit['name'] == GLOBAL_UNIT:
+            # global blocks would otherwise span the (blanked) function bodies
+            for info in blocks.values():
+                if info['lines']:
+                    info['end'] = info['lines'][-1][0]
+    with prof.phase('edges'):
+        edges = build_cfg_edges(blocks, start_to_bid, controls)
+    return blocks, edges
 
 
 # ---------- Definitions and dataflow ----------
 
-def find_definitions(blocks):
+# Regex to find assignment ops but avoid '=='
+ASSIGN_RE = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*(\+=|-=|\*=|/=|%=|<<=|>>=|&=|\|=|\^=|=)\s*")
+
+
+def find_definitions(blocks, first_id=1):
     """Find assignment definitions in blocks. Return defs dict and var->defs map."""
     defs = OrderedDict()
     var_map = defaultdict(list)
-    counter = 1
-    # Regex to find assignment ops but avoid '=='
-    assign_re = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*(?:\+=|-=|\*=|/=|%=|<<=|>>=|&=|\|=|\^=|=)\s*")
+    counter = first_id
     for bid, info in blocks.items():
         for (ln_idx, ln) in info['lines']:
-            # Ignore lines that look like conditional checks containing '=' (e.g., ==) handled by regex
-            m = assign_re.search(ln)
+            # Ignore lines that look like conditional checks containing '=' (e.g., ==) handled by regex;
+            # string and char literals are blanked first, as in statement_uses
+            code = LITERAL_RE.sub(blank_literal, ln) if ('"' in ln or "'" in ln) else ln
+            m = ASSIGN_RE.search(code)
             if m:
                 var = m.group(1)
                 did = f'D{counter}'
@@ -427,60 +564,276 @@ def compute_gen_kill(blocks, defs, var_map):
     return gen, kill
 
 
-def reaching_definitions_worklist(blocks, edges, gen, kill):
-    # Build predecessor sets
-    preds = defaultdict(set)
-    for src, dst, lab in edges:
-        preds[dst].add(src)
-    # Initialize
-    in_sets = {bid: set() for bid in blocks}
-    out_sets = {bid: set() for bid in blocks}
+C_KEYWORDS = frozenset('''
+    auto break case char const continue default do double else enum extern float for goto if
+    inline int long register restrict return short signed sizeof static struct switch typedef
+    union unsigned void volatile while bool true false NULL size_t FILE
+'''.split())
+MEMBER_RE = re.compile(r'(?:\.|->)\s*[A-Za-z_][A-Za-z0-9_]*')
+CALL_RE = re.compile(r'\b[A-Za-z_][A-Za-z0-9_]*(?=\s*\()')
+IDENT_RE = re.compile(r'\b[A-Za-z_][A-Za-z0-9_]*\b')
+
+
+def statement_uses(ln):
+    """(defined_var, used_vars) for one statement line.
+
+    defined_var follows find_definitions (first assignment target, or None).
+    Used variables are the remaining identifiers, minus keywords, function
+    names and struct members; a compound assignment (+=, ...) also uses its
+    target.
+    """
+    code = LITERAL_RE.sub(blank_literal, ln) if ('"' in ln or "'" in ln) else ln
+    target = None
+    m = ASSIGN_RE.search(code)
+    if m:
+        target = m.group(1)
+        if m.group(2) == '=':
+            # the target occurrence itself is not a use
+            code = code[:m.start(1)] + ' ' * len(target) + code[m.end(1):]
+    code = CALL_RE.sub(' ', MEMBER_RE.sub(' ', code))
+    uses = []
+    for name in IDENT_RE.findall(code):
+        if name not in C_KEYWORDS and not name[0].isdigit() and name not in uses:
+            uses.append(name)
+    return target, uses
+
+
+# ---------- Bit-vector representation ----------
+# Definitions are numbered densely (bit i <-> def_ids[i]) so every in/out/gen/kill
+# set is a single Python int and the transfer function is a few word-level ops.
+
+def index_definitions(defs):
+    """Return (def_ids, bit_of): dense numbering of the definition IDs."""
+    def_ids = list(defs.keys())
+    bit_of = {did: 1 << i for i, did in enumerate(def_ids)}
+    return def_ids, bit_of
+
 
-    changed = True
-    iteration = 0
+def ids_to_bits(ids, bit_of):
+    bits = 0
+    for did in ids:
+        bits |= bit_of[did]
+    return bits
+
+
+def bits_to_ids(bits, def_ids):
+    """Convert a bit-vector back to the list of 'D<n>' IDs it contains."""
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(def_ids[low.bit_length() - 1])
+        bits ^= low
+    return ids
+
+
+def compute_gen_kill_bits(blocks, defs, var_map, bit_of):
+    """Bit-vector version of compute_gen_kill: returns gen/kill dicts of ints."""
+    var_bits = {var: ids_to_bits(dids, bit_of) for var, dids in var_map.items()}
+    gen = {bid: 0 for bid in blocks}
+    kill = {bid: 0 for bid in blocks}
+    for did, meta in defs.items():
+        bid = meta['block']
+        bit = bit_of[did]
+        gen[bid] |= bit
+        # kill all other defs of the same variable
+        kill[bid] |= var_bits[meta['var']] & ~bit
+    return gen, kill
+
+
+def reverse_postorder(blocks, succs):
+    """Block IDs in reverse postorder of a DFS from the entry block.
+
+    succs maps bid -> successor list (see build_adjacency). Blocks not reachable
+    from the entry are visited afterwards (in block order) so that every block
+    still gets an RPO rank.
+    """
+    visited = set()
+    postorder = []
+    for root in blocks:
+        if root in visited:
+            continue
+        visited.add(root)
+        stack = [(root, iter(succs[root]))]
+        while stack:
+            node, it = stack[-1]
+            for nxt in it:
+                if nxt not in visited and nxt in blocks:
+                    visited.add(nxt)
+                    stack.append((nxt, iter(succs[nxt])))
+                    break
+            else:
+                stack.pop()
+                postorder.append(node)
+    postorder.reverse()
+    return postorder
+
+
+HISTORY_MODES = ('none', 'delta', 'full')
+
+
+def reaching_definitions_bitvector(blocks, edges, gen, kill, history_mode='full', on_pass=None,
+                                   adjacency=None):
+    """Worklist reaching definitions over int bit-vectors. gen/kill map bid -> int.
+
+    Blocks are processed in reverse postorder; only successors of a block whose
+    out[] changed are re-queued. A "pass" ends whenever the solver wraps around
+    to a block earlier in RPO, and one snapshot is taken per pass according to
+    history_mode: 'full' (every block), 'delta' (only blocks whose in/out
+    changed in that pass) or 'none'. Snapshots are passed to on_pass if given,
+    otherwise collected into the returned history list.
+    adjacency is the (succs, preds) pair from build_adjacency; it is built from
+    edges if not given.
+    Returns in_sets, out_sets, history, stats.
+    """
+    if history_mode not in HISTORY_MODES:
+        raise ValueError(f'unknown history mode: {history_mode!r}')
+    succs, preds = adjacency if adjacency is not None else build_adjacency(blocks, edges)
+    order = reverse_postorder(blocks, succs)
+    rank = {bid: i for i, bid in enumerate(order)}
+    in_sets = {bid: 0 for bid in blocks}
+    out_sets = {bid: 0 for bid in blocks}
+
+    # current pass = heap of RPO ranks still to visit; successors ranked at or
+    # before the block being evaluated go to the next pass
+    current = list(range(len(order)))
+    pending = set(current)
+    upcoming = []
+    passes = 0
+    evaluations = 0
+    set_ops = 0
     history = []
-    while changed:
-        iteration += 1
-        changed = False
-        snapshot = {'iter': iteration, 'in': {}, 'out': {}}
-        for bid in blocks:
-            # in[B] = union of out[p] for p in preds[B]
-            new_in = set()
+    while current:
+        passes += 1
+        changed = []
+        while current:
+            r = heapq.heappop(current)
+            pending.discard(r)
+            bid = order[r]
+            evaluations += 1
+            # in[B] = OR of out[p]; out[B] = gen[B] | (in[B] & ~kill[B])
+            new_in = 0
             for p in preds[bid]:
                 new_in |= out_sets[p]
-            # out[B] = gen[B] U (in[B] - kill[B])
-            new_out = set(gen.get(bid, set())) | (new_in - kill.get(bid, set()))
-            if new_in != in_sets[bid] or new_out != out_sets[bid]:
-                changed = True
-            in_sets[bid] = new_in
-            out_sets[bid] = new_out
-            snapshot['in'][bid] = set(new_in)
-            snapshot['out'][bid] = set(new_out)
-        history.append(snapshot)
-        # safety cap (shouldn't be needed but avoids infinite loops on weird input)
-        if iteration > 200:
-            print('Warning: reached 200 iterations; stopping')
-            break
+            new_out = gen.get(bid, 0) | (new_in & ~kill.get(bid, 0))
+            set_ops += len(preds[bid]) + 2
+            if new_in != in_sets[bid]:
+                in_sets[bid] = new_in
+                if new_out == out_sets[bid]:
+                    changed.append(bid)
+            if new_out != out_sets[bid]:
+                out_sets[bid] = new_out
+                changed.append(bid)
+                for s in succs[bid]:
+                    rs = rank[s]
+                    if rs in pending:
+                        continue
+                    pending.add(rs)
+                    heapq.heappush(current if rs > r else upcoming, rs)
+        if history_mode != 'none':
+            # ints are immutable, so shallow copies are real snapshots
+            if history_mode == 'full':
+                snap_in, snap_out = dict(in_sets), dict(out_sets)
+            else:
+                snap_in = {bid: in_sets[bid] for bid in changed}
+                snap_out = {bid: out_sets[bid] for bid in changed}
+            snapshot = {'iter': passes, 'in': snap_in, 'out': snap_out}
+            if on_pass is not None:
+                on_pass(snapshot)
+            else:
+                history.append(snapshot)
+        current, upcoming = upcoming, []
+    stats = {'blocks': len(order), 'passes': passes, 'evaluations': evaluations, 'set_ops': set_ops}
+    return in_sets, out_sets, history, stats
+
+
+def reaching_definitions_worklist(blocks, edges, gen, kill):
+    """Set-based entry point: gen/kill map bid -> set of 'D<n>' IDs.
+
+    Solved with the bit-vector engine and converted back to sets on return.
+    """
+    all_ids = set()
+    for s in list(gen.values()) + list(kill.values()):
+        all_ids |= s
+    def_ids = sorted(all_ids, key=lambda d: int(d[1:]) if d[1:].isdigit() else d)
+    bit_of = {did: 1 << i for i, did in enumerate(def_ids)}
+    gen_bits = {bid: ids_to_bits(gen.get(bid, ()), bit_of) for bid in blocks}
+    kill_bits = {bid: ids_to_bits(kill.get(bid, ()), bit_of) for bid in blocks}
+    in_bits, out_bits, hist_bits, _ = reaching_definitions_bitvector(blocks, edges, gen_bits, kill_bits)
+
+    def to_set(bits):
+        return set(bits_to_ids(bits, def_ids))
+
+    in_sets = {bid: to_set(b) for bid, b in in_bits.items()}
+    out_sets = {bid: to_set(b) for bid, b in out_bits.items()}
+    history = []
+    for snap in hist_bits:
+        history.append({
+            'iter': snap['iter'],
+            'in': {bid: to_set(b) for bid, b in snap['in'].items()},
+            'out': {bid: to_set(b) for bid, b in snap['out'].items()},
+        })
     return in_sets, out_sets, history
 
 
-def write_report(outpath, defs, var_map, gen, kill, blocks, in_sets, out_sets, history):
+# The report is written in three stages so that analyze_c_file (cfg_batch.py)
+# can stream the per-pass snapshots into the open file while the solver runs.
+
+def make_set_formatter(def_ids=None):
+    """Formatter for report sets: bit-vectors if def_ids is given, else sets of IDs."""
+    if def_ids is not None:
+        def fmt(x):
+            return sorted(bits_to_ids(x, def_ids))
+    else:
+        def fmt(x):
+            return sorted(list(x))
+    return fmt
+
+
+def write_report_header(f, defs, gen, kill, blocks, fmt):
+    f.write('=== Definitions (ID -> var, block, line) ===\n')
+    for did, m in defs.items():
+        f.write(f"{did}: {m['var']} in {m['block']} (line {m['line_idx']}): {m['text']}\n")
+    f.write('\n=== gen[B] and kill[B] ===\n')
+    for bid in blocks.keys():
+        f.write(f"{bid}: gen={fmt(gen.get(bid, set()))} kill={fmt(kill.get(bid, set()))}\n")
+    f.write('\n=== Dataflow iterations (snapshot per iteration) ===\n')
+
+
+def write_report_pass(f, snap, blocks, fmt):
+    # delta snapshots only hold the blocks that changed in this pass
+    f.write(f"-- Iteration {snap['iter']} --\n")
+    snap_in, snap_out = snap['in'], snap['out']
+    for bid in blocks.keys():
+        if bid in snap_in:
+            f.write(f"{bid}: in={fmt(snap_in[bid])} out={fmt(snap_out[bid])}\n")
+    f.write('\n')
+
+
+def write_report_footer(f, blocks, in_sets, out_sets, fmt, stats=None):
+    if stats is not None and stats.get('solver') == 'sparse':
+        f.write(f"Sparse SSA solver: {stats['phis']} phis, {stats['evaluations']} phi evaluations "
+                f"({stats['blocks']} blocks)\n")
+    elif stats is not None:
+        f.write(f"Worklist solver: {stats['passes']} passes, {stats['evaluations']} block evaluations "
+                f"({stats['blocks']} blocks)\n")
+    f.write('\n=== Final in[B] / out[B] ===\n')
+    for bid in blocks.keys():
+        f.write(f"{bid}: in={fmt(in_sets[bid])} out={fmt(out_sets[bid])}\n")
+
+
+def write_unit_banner(f, unit):
+    f.write(f"##### {unit['name']} (lines {unit['start']}-{unit['end']}) #####\n")
+
+
+def write_report(outpath, defs, var_map, gen, kill, blocks, in_sets, out_sets, history, def_ids=None, stats=None):
+    """Write the text report from an already collected history. If def_ids is
+    given, gen/kill/in/out are bit-vectors and are converted back to 'D<n>' IDs here."""
+    fmt = make_set_formatter(def_ids)
     with open(outpath, 'w') as f:
-        f.write('=== Definitions (ID -> var, block, line) ===\n')
-        for did, m in defs.items():
-            f.write(f"{did}: {m['var']} in {m['block']} (line {m['line_idx']}): {m['text']}\n")
-        f.write('\n=== gen[B] and kill[B] ===\n')
-        for bid in blocks.keys():
-            f.write(f"{bid}: gen={sorted(list(gen.get(bid, [])))} kill={sorted(list(kill.get(bid, [])))}\n")
-        f.write('\n=== Dataflow iterations (snapshot per iteration) ===\n')
+        write_report_header(f, defs, gen, kill, blocks, fmt)
         for snap in history:
-            f.write(f"-- Iteration {snap['iter']} --\n")
-            for bid in blocks.keys():
-                f.write(f"{bid}: in={sorted(list(snap['in'][bid]))} out={sorted(list(snap['out'][bid]))}\n")
-            f.write('\n')
-        f.write('\n=== Final in[B] / out[B] ===\n')
-        for bid in blocks.keys():
-            f.write(f"{bid}: in={sorted(list(in_sets[bid]))} out={sorted(list(out_sets[bid]))}\n")
+            write_report_pass(f, snap, blocks, fmt)
+        write_report_footer(f, blocks, in_sets, out_sets, fmt, stats)
     print(f'Wrote reaching definitions report to {outpath}')
 
 
@@ -493,36 +846,208 @@ def compute_metrics(blocks, edges):
     return N, E, CC
 
 
+class Profiler:
+    """Per-phase wall time (and, with trace_memory, tracemalloc allocation)
+    plus named counters. Phases must not be nested when tracing memory."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = OrderedDict()
+        self.counters = OrderedDict()
+
+    @contextmanager
+    def phase(self, name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            rec = self.phases.setdefault(name, {'calls': 0, 'time': 0.0, 'alloc': 0, 'peak': 0})
+            rec['calls'] += 1
+            rec['time'] += dt
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                rec['alloc'] += current - before
+                rec['peak'] = max(rec['peak'], peak - before)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        phases = OrderedDict()
+        for name, rec in self.phases.items():
+            phases[name] = dict(rec, time=round(rec['time'], 6))
+            if not self.trace_memory:
+                del phases[name]['alloc'], phases[name]['peak']
+        return {'phases': phases, 'counters': dict(self.counters),
+                'total_time': round(sum(r['time'] for r in self.phases.values()), 6)}
+
+
 # ----------------- Main -----------------
 
-def analyze_c_file(cpath, render=False):
-    with open(cpath, 'r') as f:
-        code = f.read()
-    lines = preprocess(code)
-    leaders, controls = find_leaders_and_controls(lines)
-    blocks, start_to_bid = build_basic_blocks(lines, leaders)
-    edges = build_cfg_edges(blocks, start_to_bid, controls)
-    base = os.path.splitext(os.path.basename(cpath))[0]
-    outdot = base + '_cfg.dot'
-    write_dot(blocks, edges, outdot)
-    if render:
-        pngfile = base + '_cfg.png'
-        render_dot(outdot, pngfile)
-
-    N, E, CC = compute_metrics(blocks, edges)
-    print('Metrics: N (nodes)=', N, 'E (edges)=', E, 'Cyclomatic Complexity =', CC)
-
-    defs, vmap = find_definitions(blocks)
-    gen, kill = compute_gen_kill(blocks, defs, vmap)
-    in_sets, out_sets, history = reaching_definitions_worklist(blocks, edges, gen, kill)
-    outrep = base + '_reaching.txt'
-    write_report(outrep, defs, vmap, gen, kill, blocks, in_sets, out_sets, history)
-    print('\nDone.\n')
+def prepare_unit(unit, first_bid=0, first_def=1, prof=None):
+    """CFG, definitions and gen/kill bit-vectors for one unit (see build_units)."""
+    prof = prof or Profiler()
+    blocks, edges = build_unit_cfg(unit, first_bid=first_bid, prof=prof)
+    with prof.phase('edges'):
+        adjacency = build_adjacency(blocks, edges)
+    with prof.phase('definitions'):
+        defs, vmap = find_definitions(blocks, first_id=first_def)
+    with prof.phase('gen_kill'):
+        def_ids, bit_of = index_definitions(defs)
+        gen, kill = compute_gen_kill_bits(blocks, defs, vmap, bit_of)
+    return {
+        'name': unit['name'],
+        'start': unit['start'],
+        'end': unit['end'],
+        'blocks': blocks,
+        'edges': edges,
+        'adjacency': adjacency,
+        'metrics': compute_metrics(blocks, edges),
+        'defs': defs,
+        'var_map': vmap,
+        'def_ids': def_ids,
+        'gen': gen,
+        'kill': kill,
+    }
+
+
+# dense: iterative bit-vector worklist over all blocks; sparse: propagation
+# along SSA def-use links (see ssa.py), same in/out sets without pass history
+SOLVERS = ('dense', 'sparse')
+
+
+def solve_unit(u, history='full', on_pass=None, solver='dense'):
+    """Run the solver on a prepared unit; returns (in, out, history, stats, seconds)."""
+    t0 = time.perf_counter()
+    if solver == 'sparse':
+        from ssa import sparse_reaching_definitions
+        in_sets, out_sets, stats = sparse_reaching_definitions(u)
+        hist = []
+    else:
+        in_sets, out_sets, hist, stats = reaching_definitions_bitvector(
+            u['blocks'], u['edges'], u['gen'], u['kill'], history_mode=history,
+            on_pass=on_pass, adjacency=u['adjacency'])
+    return in_sets, out_sets, hist, stats, time.perf_counter() - t0
+
+
+def _solve_job(job):
+    # worker-process entry point: only the dataflow problem is shipped
+    edges, gen, kill, adjacency, defs, def_ids, history, solver = job
+    u = {'blocks': dict.fromkeys(gen), 'edges': edges, 'gen': gen, 'kill': kill, 'adjacency': adjacency,
+         'defs': defs, 'def_ids': def_ids}
+    return solve_unit(u, history=history, solver=solver)
+
+
+def prepare_units(lines, cache=None, prof=None):
+    """Units of a preprocessed file (see build_units), each loaded from the
+    cache or prepared afresh, with block/definition IDs numbered file-wide.
+    Units loaded from the cache already carry 'in', 'out' and 'stats'."""
+    prof = prof or Profiler()
+    with prof.phase('split_units'):
+        file_units = build_units(lines)
+    units = []
+    next_bid, next_def = 0, 1
+    for unit in file_units:
+        u = None
+        if cache is not None:
+            with prof.phase('cache_load'):
+                u = cache.load(unit, next_bid, next_def)
+        if u is None:
+            u = prepare_unit(unit, first_bid=next_bid, first_def=next_def, prof=prof)
+        u['unit'] = unit
+        next_bid += len(u['blocks'])
+        next_def += len(u['defs'])
+        units.append(u)
+    return units
+
+
+def solve_units_parallel(units, todo, jobs, history='none', prof=None, solver='dense'):
+    """Solve units[k] for k in todo in a process pool; returns {k: solve_unit result}."""
+    prof = prof or Profiler()
+    job_list = [(units[k]['edges'], units[k]['gen'], units[k]['kill'], units[k]['adjacency'],
+                 units[k]['defs'], units[k]['def_ids'], history, solver) for k in todo]
+    # allocations inside the workers are not traced
+    with prof.phase('solve'):
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return dict(zip(todo, pool.map(_solve_job, job_list)))
 
 
 if __name__ == '__main__':
+    # these modules build on this one, so they are only imported to run the CLI
+    from cfg_api import analyze_file, answer_queries, build_chains, parse_query
+    from cfg_batch import analyze_c_file, analyze_tree, write_summary
+    from cfg_cache import AnalysisCache
+    from cfg_render import COLLAPSE_BLOCKS, RENDER_FORMATS
+
     parser = argparse.ArgumentParser(description='CFG + Reaching Definitions lightweight tool')
-    parser.add_argument('cfile', help='Path to a single .c file (standalone)')
-    parser.add_argument('--render', action='store_true', help='Attempt to render DOT to PNG using dot')
+    parser.add_argument('cfile', help='Path to a single .c file, a directory, or a glob pattern (batch mode)')
+    parser.add_argument('--render', action='store_true', help='Attempt to render DOT to an image using dot')
+    parser.add_argument('--format', choices=RENDER_FORMATS, default='png',
+                        help='Image format for --render (svg lays out and writes faster)')
+    parser.add_argument('--render-jobs', type=int, default=None,
+                        help='Batch mode: concurrent dot processes (default: CPU count)')
+    parser.add_argument('--collapse-over', type=int, default=COLLAPSE_BLOCKS,
+                        help='Draw functions with more blocks than this as straight-line chains with line ranges '
+                             'only, in at most this many nodes (0: never collapse)')
+    parser.add_argument('--history', choices=HISTORY_MODES, default='full',
+                        help='Per-pass snapshots in the report: none, delta (changed blocks only) or full')
+    parser.add_argument('--solver', choices=SOLVERS, default='dense',
+                        help='Reaching-definitions solver: dense bit-vector worklist, or sparse propagation '
+                             'over SSA (no per-pass history); both give identical in/out sets')
+    parser.add_argument('--outdir', default='cfg_out', help='Batch mode: output directory (mirrors the source tree)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Worker processes: files in batch mode (default: CPU count), '
+                             'functions for a single file (default: 1)')
+    parser.add_argument('--summary', default=None,
+                        help='Batch mode: summary file, .json or .csv (default: <outdir>/summary.json)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the incremental cache')
+    parser.add_argument('--cache-dir', default='.cfg_cache',
+                        help='Incremental cache directory (cached results are reused with --history none)')
+    parser.add_argument('--cache-size', type=int, default=256, help='Cache size limit in MB (LRU eviction)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Write per-phase time/allocation and counters to <base>_profile.json')
+    parser.add_argument('--cprofile', default=None, metavar='FILE',
+                        help='Also dump cProfile stats of the run to FILE (view with pstats/snakeviz)')
+    parser.add_argument('--query', action='append', default=[], metavar='LINE:VAR',
+                        help='Query mode: print the definitions reaching VAR at LINE (report line numbering) '
+                             'as JSON instead of writing outputs; may be repeated')
+    parser.add_argument('--query-file', default=None,
+                        help='Query mode: file with one LINE:VAR query per line')
     args = parser.parse_args()
-    analyze_c_file(args.cfile, render=args.render)
+    cache = None if args.no_cache else AnalysisCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+    render = args.format if args.render else False
+    collapse_over = args.collapse_over or None
+    profiler = None
+    if args.cprofile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if args.query or args.query_file:
+        try:
+            queries = [parse_query(q) for q in args.query]
+            if args.query_file:
+                with open(args.query_file) as f:
+                    queries += [parse_query(q) for q in f if q.strip()]
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        result = analyze_file(args.cfile, cache=cache, jobs=args.jobs or 1, solver=args.solver)
+        chains = build_chains(result)
+        for answer in answer_queries(result, chains, queries):
+            print(json.dumps(answer))
+    elif os.path.isfile(args.cfile):
+        analyze_c_file(args.cfile, render=render, history=args.history, jobs=args.jobs or 1, cache=cache,
+                       profile=args.profile, solver=args.solver, collapse_over=collapse_over)
+    else:
+        results = analyze_tree(args.cfile, args.outdir, jobs=args.jobs, render=render, history=args.history,
+                               cache=cache, profile=args.profile, solver=args.solver, collapse_over=collapse_over,
+                               render_jobs=args.render_jobs)
+        if results:
+            write_summary(results, args.summary or os.path.join(args.outdir, 'summary.json'))
+    if profiler is not None:
+        # in batch mode this only covers the parent process
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f'Wrote cProfile stats to {args.cprofile}')
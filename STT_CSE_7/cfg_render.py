@@ -0,0 +1,221 @@
+import hashlib
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import cfg_reaching_definitions as crd
+
+
+# ----------------- DOT output and rendering -----------------
+
+def dot_statements(blocks, edges, indent='  '):
+    """Node and edge statements of a CFG in DOT syntax (one string per line)."""
+    out = []
+    for bid, info in blocks.items():
+        label_lines = [f'{bid}:']
+        if info['lines']:
+            for (ln_idx, ln) in info['lines']:
+                # escape quotes and backslashes for DOT
+                esc = ln.replace('\\', '\\\\').replace('"', '\\"')
+                label_lines.append(f'{ln_idx}: {esc}')
+        else:
+            # Block has no lines, put "void"
+            label_lines.append('void')
+        label = '\\n'.join(label_lines)
+        out.append(f'{indent}{bid} [label="{label}"];\n')
+    for src, dst, lab in edges:
+        if lab and lab != 'seq':
+            out.append(f'{indent}{src} -> {dst} [label="{lab}"];\n')
+        else:
+            out.append(f'{indent}{src} -> {dst};\n')
+    return out
+
+
+# Units with more blocks than this are drawn collapsed (see collapse_chains)
+# so that dot's layout time stays bounded on generated or huge functions.
+COLLAPSE_BLOCKS = 150
+RENDER_FORMATS = ('png', 'svg')
+
+
+def collapse_chains(blocks, edges):
+    """Merge straight-line chains (a block whose only successor has it as only
+    predecessor) into one node. Returns (groups, group_edges): lists of bids
+    in chain order, and de-duplicated (head, head, label) edges between
+    groups."""
+    succs, preds = crd.build_adjacency(blocks, edges)
+    head = {}
+    groups = []
+
+    def grow(bid):
+        chain = [bid]
+        head[bid] = bid
+        cur = bid
+        while len(succs[cur]) == 1:
+            nxt = succs[cur][0]
+            if nxt in head or len(preds[nxt]) != 1:
+                break
+            head[nxt] = bid
+            chain.append(nxt)
+            cur = nxt
+        groups.append(chain)
+
+    for bid in blocks:
+        ps = preds[bid]
+        continues_chain = len(ps) == 1 and ps[0] != bid and len(succs[ps[0]]) == 1
+        if bid not in head and not continues_chain:
+            grow(bid)
+    # pure cycles of single-successor blocks have no natural start
+    for bid in blocks:
+        if bid not in head:
+            grow(bid)
+    group_edges = []
+    seen = set()
+    for src, dst, lab in edges:
+        e = (head[src], head[dst], lab)
+        # edges inside a chain disappear with it
+        if (head[src] == head[dst] and dst != head[dst]) or e in seen:
+            continue
+        seen.add(e)
+        group_edges.append(e)
+    return groups, group_edges
+
+
+def dot_collapsed_statements(blocks, edges, indent='  ', max_nodes=None):
+    """Node and edge statements for a collapsed CFG: one node per straight-line
+    chain, labelled with its block and line ranges instead of the code. If
+    there are still more than max_nodes chains, the chains after the first
+    max_nodes - 1 (in block order) are drawn as one summary node."""
+    groups, group_edges = collapse_chains(blocks, edges)
+    node = {chain[0]: chain[0] for chain in groups}
+    out = []
+    if max_nodes is not None and len(groups) > max_nodes:
+        groups, rest = groups[:max_nodes - 1], groups[max_nodes - 1:]
+        rest_id = f'{rest[0][0]}_rest'
+        for chain in rest:
+            node[chain[0]] = rest_id
+        starts = [blocks[bid]['start'] for chain in rest for bid in chain]
+        ends = [blocks[bid]['end'] for chain in rest for bid in chain]
+        nblocks = sum(len(chain) for chain in rest)
+        out.append(f'{indent}{rest_id} [label="{len(rest)} more nodes ({nblocks} blocks)\\n'
+                   f'lines {min(starts)}-{max(ends)}", style=dashed];\n')
+    for chain in groups:
+        first, last = blocks[chain[0]], blocks[chain[-1]]
+        name = chain[0] if len(chain) == 1 else f'{chain[0]}..{chain[-1]}'
+        out.append(f'{indent}{chain[0]} [label="{name}\\nlines {first["start"]}-{last["end"]}"];\n')
+    seen = set()
+    for src, dst, lab in group_edges:
+        src, dst = node[src], node[dst]
+        # edges inside the summary node disappear with it
+        if (src, dst, lab) in seen or (src == dst and src not in blocks):
+            continue
+        seen.add((src, dst, lab))
+        if lab and lab != 'seq':
+            out.append(f'{indent}{src} -> {dst} [label="{lab}"];\n')
+        else:
+            out.append(f'{indent}{src} -> {dst};\n')
+    return out
+
+
+def dot_text(blocks, edges):
+    return ''.join(['digraph CFG {\n', '  node [shape=box, fontname="monospace"];\n']
+                   + dot_statements(blocks, edges) + ['}\n'])
+
+
+def dot_text_units(units, collapse_over=COLLAPSE_BLOCKS):
+    """DOT text with a cluster subgraph per function unit, built in one buffer.
+    Units with more than collapse_over blocks are collapsed (None: never) and
+    drawn with at most collapse_over nodes."""
+    parts = ['digraph CFG {\n', '  node [shape=box, fontname="monospace"];\n']
+    for k, u in enumerate(units):
+        N, E, CC = u['metrics']
+        collapsed = collapse_over is not None and N > collapse_over
+        parts.append(f'  subgraph cluster_{k} {{\n')
+        parts.append(f'    label="{u["name"]} (N={N}, E={E}, CC={CC}{", collapsed" if collapsed else ""})";\n')
+        if collapsed:
+            parts.extend(dot_collapsed_statements(u['blocks'], u['edges'], indent='    ',
+                                                      max_nodes=collapse_over))
+        else:
+            parts.extend(dot_statements(u['blocks'], u['edges'], indent='    '))
+        parts.append('  }\n')
+    parts.append('}\n')
+    return ''.join(parts)
+
+
+def write_if_changed(path, text):
+    """Write text unless the file already holds exactly it (compared by hash),
+    so that unchanged outputs keep their mtime. Returns True if written."""
+    data = text.encode()
+    try:
+        with open(path, 'rb') as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                return False
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def write_dot(blocks, edges, outdot, verbose=True):
+    write_if_changed(outdot, dot_text(blocks, edges))
+    if verbose:
+        print(f'Wrote DOT to {outdot}')
+
+
+def write_dot_units(units, outdot, verbose=True, collapse_over=COLLAPSE_BLOCKS):
+    """One DOT file with a cluster subgraph per function unit."""
+    write_if_changed(outdot, dot_text_units(units, collapse_over))
+    if verbose:
+        print(f'Wrote DOT to {outdot}')
+
+
+def image_up_to_date(dotfile, imgfile):
+    # the DOT file is only rewritten when its content changes (write_if_changed),
+    # so an image at least as new as it was rendered from the same text
+    try:
+        return os.stat(imgfile).st_mtime_ns >= os.stat(dotfile).st_mtime_ns
+    except OSError:
+        return False
+
+
+def render_dot(dotfile, pngfile, verbose=True):
+    """Render one DOT file; the output format follows the image extension.
+    dot writes to a temporary file that replaces the image only on success,
+    so a failed run never leaves a partial image that looks up to date."""
+    fmt = os.path.splitext(pngfile)[1].lstrip('.') or 'png'
+    tmp = f'{pngfile}.{os.getpid()}.tmp'
+    try:
+        subprocess.run(['dot', f'-T{fmt}', dotfile, '-o', tmp], check=True)
+        os.replace(tmp, pngfile)
+        if verbose:
+            print(f'Rendered {fmt.upper()} to {pngfile}')
+        return True
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        print(f'Could not render {fmt.upper()} automatically. Make sure Graphviz "dot" is installed and on PATH.')
+        print(f'You can manually run: dot -T{fmt}', dotfile, '-o', pngfile)
+        return False
+
+
+def image_path(base, render):
+    fmt = 'png' if render is True else render
+    return f'{base}_cfg.{fmt}'
+
+
+def render_many(pairs, jobs=None, verbose=True, force=False):
+    """Render (dotfile, imgfile) pairs with at most `jobs` concurrent dot
+    processes, skipping images that are up to date. Returns counts of
+    rendered / skipped / failed images."""
+    todo = [(d, i) for d, i in pairs if force or not image_up_to_date(d, i)]
+    counts = {'rendered': 0, 'skipped': len(pairs) - len(todo), 'failed': 0}
+    if todo:
+        # dot does the work in its own process: threads are enough to overlap them
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            for ok in pool.map(lambda p: render_dot(p[0], p[1], verbose=verbose), todo):
+                counts['rendered' if ok else 'failed'] += 1
+    if verbose and counts['skipped']:
+        print(f"Skipped {counts['skipped']} up-to-date image(s)")
+    return counts
@@ -0,0 +1,291 @@
+import argparse
+import heapq
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import cfg_reaching_definitions as crd
+
+
+# ---------- Generic bit-vector dataflow framework ----------
+# An analysis is declared by its direction, meet operator, the universe of
+# facts (bit i <-> universe[i]) and per-block gen/kill bit-vectors. All
+# analyses of one direction are solved together in a single worklist
+# traversal over the shared CFG, successor/predecessor lists and ordering.
+
+FORWARD = 'forward'
+BACKWARD = 'backward'
+UNION = 'union'
+INTERSECTION = 'intersection'
+
+
+@dataclass
+class Analysis:
+    name: str
+    direction: str          # FORWARD or BACKWARD
+    meet: str               # UNION or INTERSECTION
+    universe: list          # fact labels; bit i <-> universe[i]
+    gen: dict               # bid -> int
+    kill: dict              # bid -> int
+    boundary: int = 0       # value at the entry (forward) / exits (backward)
+
+
+@dataclass
+class CFGView:
+    """The parts of a unit's CFG every analysis shares."""
+    blocks: list            # bids in block order
+    succs: dict
+    preds: dict
+    rpo: list               # reverse postorder from the entry block
+
+
+def cfg_view(u):
+    """CFGView of a unit dict from crd.prepare_units / crd.prepare_unit."""
+    succs, preds = u['adjacency']
+    return CFGView(blocks=list(u['blocks']), succs=succs, preds=preds,
+                   rpo=crd.reverse_postorder(u['blocks'], succs))
+
+
+def solve(view, analyses):
+    """
+    Solve several analyses over one CFG.
+    Returns {name: {'in': {bid: int}, 'out': {bid: int}, 'stats': {...}}} where
+    'in' is the value at block entry and 'out' at block exit, for either
+    direction.
+    """
+    results = {}
+    for direction in (FORWARD, BACKWARD):
+        group = [a for a in analyses if a.direction == direction]
+        if group:
+            results.update(_solve_group(view, group, direction))
+    return results
+
+
+def _solve_group(view, group, direction):
+    if direction == FORWARD:
+        order, sources, targets = view.rpo, view.preds, view.succs
+    else:
+        # backward problems run on the reversed graph, in postorder
+        order, sources, targets = view.rpo[::-1], view.succs, view.preds
+    rank = {bid: i for i, bid in enumerate(order)}
+    full = [(1 << len(a.universe)) - 1 for a in group]
+    # "before" is the meet over sources, "after" the transfer result
+    before = [{bid: 0 for bid in order} for _ in group]
+    after = [{bid: (full[k] if a.meet == INTERSECTION else 0) for bid in order}
+             for k, a in enumerate(group)]
+
+    current = list(range(len(order)))
+    pending = set(current)
+    upcoming = []
+    passes = 0
+    evaluations = 0
+    while current:
+        passes += 1
+        while current:
+            r = heapq.heappop(current)
+            pending.discard(r)
+            bid = order[r]
+            evaluations += 1
+            srcs = sources[bid]
+            changed = False
+            for k, a in enumerate(group):
+                if not srcs:
+                    val = a.boundary
+                elif a.meet == UNION:
+                    val = 0
+                    for p in srcs:
+                        val |= after[k][p]
+                else:
+                    val = full[k]
+                    for p in srcs:
+                        val &= after[k][p]
+                before[k][bid] = val
+                new = a.gen.get(bid, 0) | (val & ~a.kill.get(bid, 0))
+                if new != after[k][bid]:
+                    after[k][bid] = new
+                    changed = True
+            if changed:
+                for t in targets[bid]:
+                    rt = rank[t]
+                    if rt in pending:
+                        continue
+                    pending.add(rt)
+                    heapq.heappush(current if rt > r else upcoming, rt)
+        current, upcoming = upcoming, []
+
+    stats = {'direction': direction, 'passes': passes, 'evaluations': evaluations,
+             'analyses': [a.name for a in group]}
+    out = {}
+    for k, a in enumerate(group):
+        if direction == FORWARD:
+            out[a.name] = {'in': before[k], 'out': after[k], 'stats': stats}
+        else:
+            out[a.name] = {'in': after[k], 'out': before[k], 'stats': stats}
+    return out
+
+
+# ---------- Analyses ----------
+
+# binary expression over identifiers/constants, matched with a lookahead so
+# that 'a + b + c' yields both 'a + b' and 'b + c'
+EXPR_RE = re.compile(r'(?<![.\w>])(?=([A-Za-z_]\w*|\d+)\s*(<<|>>|[+\-*/%&|^])\s*([A-Za-z_]\w*|\d+)\b'
+                     r'(?!\s*(?:[(.\[]|->)))')
+
+
+def statement_exprs(ln):
+    """Binary expressions computed by one statement, as 'a op b' strings."""
+    code = crd.LITERAL_RE.sub(crd.blank_literal, ln) if ('"' in ln or "'" in ln) else ln
+    m = crd.ASSIGN_RE.search(code)
+    if m:
+        # only the right-hand side is evaluated
+        code = code[m.end():]
+    exprs = []
+    for a, op, b in EXPR_RE.findall(code):
+        if a in crd.C_KEYWORDS or b in crd.C_KEYWORDS or (a.isdigit() and b.isdigit()):
+            continue
+        e = f'{a} {op} {b}'
+        if e not in exprs:
+            exprs.append(e)
+    return exprs
+
+
+def _operands(expr):
+    a, _, b = expr.split(' ')
+    return a, b
+
+
+def reaching_definitions(u):
+    return Analysis('reaching', FORWARD, UNION, list(u['def_ids']), u['gen'], u['kill'])
+
+
+def live_variables(u):
+    """use[B] (used before defined in B) as gen, def[B] as kill."""
+    stmts = {bid: [crd.statement_uses(ln) for _, ln in info['lines']] for bid, info in u['blocks'].items()}
+    names = []
+    index = {}
+    for per_block in stmts.values():
+        for target, uses in per_block:
+            for v in ([target] if target else []) + uses:
+                if v not in index:
+                    index[v] = len(names)
+                    names.append(v)
+    gen, kill = {}, {}
+    for bid, per_block in stmts.items():
+        g = k = 0
+        for target, uses in per_block:
+            for v in uses:
+                if not (k >> index[v]) & 1:
+                    g |= 1 << index[v]
+            if target:
+                k |= 1 << index[target]
+        gen[bid], kill[bid] = g, k
+    return Analysis('live', BACKWARD, UNION, names, gen, kill)
+
+
+def _expression_facts(u):
+    stmts = {bid: [(crd.statement_uses(ln)[0], statement_exprs(ln)) for _, ln in info['lines']]
+             for bid, info in u['blocks'].items()}
+    exprs = []
+    index = {}
+    for per_block in stmts.values():
+        for _, es in per_block:
+            for e in es:
+                if e not in index:
+                    index[e] = len(exprs)
+                    exprs.append(e)
+    # var -> bit-vector of expressions that read it
+    by_var = {}
+    for e, i in index.items():
+        for v in _operands(e):
+            by_var[v] = by_var.get(v, 0) | (1 << i)
+    return stmts, exprs, index, by_var
+
+
+def available_expressions(u):
+    """Expressions computed in B and not later killed in B as gen; all
+    expressions over variables B redefines as kill."""
+    stmts, exprs, index, by_var = _expression_facts(u)
+    gen, kill = {}, {}
+    for bid, per_block in stmts.items():
+        g = k = 0
+        for target, es in per_block:
+            for e in es:
+                g |= 1 << index[e]
+            if target:
+                g &= ~by_var.get(target, 0)
+                k |= by_var.get(target, 0)
+        gen[bid], kill[bid] = g, k
+    return Analysis('available', FORWARD, INTERSECTION, exprs, gen, kill)
+
+
+def very_busy_expressions(u):
+    """Expressions evaluated in B before any operand is redefined as gen;
+    expressions over variables B redefines as kill."""
+    stmts, exprs, index, by_var = _expression_facts(u)
+    gen, kill = {}, {}
+    for bid, per_block in stmts.items():
+        g = k = 0
+        for target, es in reversed(per_block):
+            if target:
+                g &= ~by_var.get(target, 0)
+                k |= by_var.get(target, 0)
+            for e in es:
+                g |= 1 << index[e]
+        gen[bid], kill[bid] = g, k
+    return Analysis('busy', BACKWARD, INTERSECTION, exprs, gen, kill)
+
+
+ANALYSES = OrderedDict([
+    ('reaching', reaching_definitions),
+    ('live', live_variables),
+    ('available', available_expressions),
+    ('busy', very_busy_expressions),
+])
+
+
+def analyze_units(units, names):
+    """Solve the named analyses for every unit; yields (unit, analyses, results)."""
+    for u in units:
+        analyses = [ANALYSES[n](u) for n in names]
+        yield u, analyses, solve(cfg_view(u), analyses)
+
+
+def labels(bits, universe):
+    out = []
+    while bits:
+        low = bits & -bits
+        out.append(universe[low.bit_length() - 1])
+        bits ^= low
+    return sorted(out)
+
+
+def write_dataflow_report(outpath, units, names):
+    with open(outpath, 'w') as f:
+        for k, (u, analyses, results) in enumerate(analyze_units(units, names)):
+            if k:
+                f.write('\n')
+            crd.write_unit_banner(f, u)
+            for a in analyses:
+                res = results[a.name]
+                st = res['stats']
+                f.write(f"=== {a.name} ({a.direction}, {a.meet}) ===\n")
+                for bid in u['blocks']:
+                    f.write(f"{bid}: in={labels(res['in'][bid], a.universe)} "
+                            f"out={labels(res['out'][bid], a.universe)}\n")
+                f.write(f"({st['direction']} traversal shared by {', '.join(st['analyses'])}: "
+                        f"{st['passes']} passes, {st['evaluations']} block evaluations)\n\n")
+    print(f'Wrote dataflow report to {outpath}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bit-vector dataflow analyses over the per-function CFGs')
+    parser.add_argument('cfile', help='Path to a single .c file')
+    parser.add_argument('--analyses', nargs='+', choices=list(ANALYSES), default=list(ANALYSES),
+                        help='Analyses to solve (all share one CFG and one traversal per direction)')
+    args = parser.parse_args()
+    with open(args.cfile, 'r') as f:
+        lines = crd.preprocess(f.read())
+    units = crd.prepare_units(lines)
+    base = os.path.splitext(os.path.basename(args.cfile))[0]
+    write_dataflow_report(base + '_dataflow.txt', units, args.analyses)
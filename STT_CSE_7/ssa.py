@@ -0,0 +1,349 @@
+import argparse
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import cfg_reaching_definitions as crd
+
+
+# ---------- Dominators ----------
+# A virtual root (None) is placed above the entry block and above every other
+# DFS root of reverse_postorder (blocks unreachable from the entry), so every
+# block has an immediate dominator and unreachable code is still covered.
+
+ROOT = None
+
+
+def rooted_rpo(blocks, succs):
+    """(rpo, roots): reverse postorder starting with the virtual root, and the
+    blocks the root is connected to."""
+    order = crd.reverse_postorder(blocks, succs)
+    reached = set()
+    roots = []
+    # every DFS root of reverse_postorder starts a new tree: find them by
+    # walking blocks in block order, as reverse_postorder does
+    for root in blocks:
+        if root in reached:
+            continue
+        roots.append(root)
+        stack = [root]
+        reached.add(root)
+        while stack:
+            node = stack.pop()
+            for nxt in succs[node]:
+                if nxt not in reached:
+                    reached.add(nxt)
+                    stack.append(nxt)
+    return [ROOT] + order, roots
+
+
+def dominators(blocks, succs, preds):
+    """
+    Immediate dominators (Cooper, Harvey & Kennedy iterative algorithm).
+    Returns (idom, roots) where idom maps bid -> immediate dominator (ROOT for
+    the entry and the other DFS roots listed in roots).
+    """
+    rpo, roots = rooted_rpo(blocks, succs)
+    rank = {bid: i for i, bid in enumerate(rpo)}
+    root_set = set(roots)
+    idom = {ROOT: ROOT}
+
+    def intersect(a, b):
+        while a != b:
+            while rank[a] > rank[b]:
+                a = idom[a]
+            while rank[b] > rank[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for bid in rpo[1:]:
+            cands = [p for p in preds[bid] if p in idom]
+            if bid in root_set:
+                cands.append(ROOT)
+            new = cands[0]
+            for p in cands[1:]:
+                new = intersect(p, new)
+            if bid not in idom or idom[bid] != new:
+                idom[bid] = new
+                changed = True
+    return idom, roots
+
+
+def dominator_tree(idom):
+    """children lists of the dominator tree (ROOT included)."""
+    children = defaultdict(list)
+    for bid, d in idom.items():
+        if bid is not ROOT:
+            children[d].append(bid)
+    return children
+
+
+def dominance_frontiers(blocks, preds, idom, roots):
+    """DF[b] for every block: blocks where b's dominance ends."""
+    df = {bid: set() for bid in blocks}
+    root_set = set(roots)
+    for bid in blocks:
+        ps = list(preds[bid]) + ([ROOT] if bid in root_set else [])
+        if len(ps) < 2:
+            continue
+        for p in ps:
+            runner = p
+            while runner is not ROOT and runner != idom[bid]:
+                df[runner].add(bid)
+                runner = idom[runner]
+    return df
+
+
+def iterated_frontier(df, def_blocks):
+    """Blocks needing a phi for a variable defined in def_blocks."""
+    result = set()
+    work = list(def_blocks)
+    seen = set(def_blocks)
+    while work:
+        b = work.pop()
+        for y in df[b]:
+            if y not in result:
+                result.add(y)
+                if y not in seen:
+                    seen.add(y)
+                    work.append(y)
+    return result
+
+
+# ---------- SSA ----------
+# SSAForm is a slotted dataclass: like cfg_api.py, this module needs Python 3.10+.
+
+@dataclass(slots=True)
+class SSAForm:
+    """Minimal SSA for the variables of one unit.
+
+    Values are numbered; each is either the definitions of one variable in
+    one block (expanded to those definitions' bits, mirroring the block-level
+    gen sets of compute_gen_kill_bits) or a phi with one operand per
+    predecessor (None where the variable is undefined on that edge).
+    """
+    idom: dict = field(default_factory=dict)
+    children: dict = field(default_factory=dict)
+    frontier: dict = field(default_factory=dict)
+    phis: dict = field(default_factory=dict)            # bid -> {var: phi value id}
+    value_var: list = field(default_factory=list)       # value id -> var
+    value_bits: list = field(default_factory=list)      # value id -> bits of its own definitions (0 for phis)
+    phi_operands: dict = field(default_factory=dict)    # phi value id -> [value id or None], one per pred
+    block_values: dict = field(default_factory=dict)    # bid -> {var: value id} defined in the block
+
+
+def build_ssa(u):
+    """SSA form of a prepared unit (see crd.prepare_unit)."""
+    blocks = u['blocks']
+    succs, preds = u['adjacency']
+    ssa = SSAForm()
+    idom, roots = dominators(blocks, succs, preds)
+    ssa.idom = idom
+    ssa.children = dominator_tree(idom)
+    ssa.frontier = dominance_frontiers(blocks, preds, idom, roots)
+
+    bit_of = {did: 1 << i for i, did in enumerate(u['def_ids'])}
+    def_blocks = defaultdict(set)
+    for bid in blocks:
+        ssa.block_values[bid] = {}
+    for did, m in u['defs'].items():
+        bid, var = m['block'], m['var']
+        def_blocks[var].add(bid)
+        vals = ssa.block_values[bid]
+        if var not in vals:
+            vals[var] = _new_value(ssa, var, 0)
+        ssa.value_bits[vals[var]] |= bit_of[did]
+
+    for bid in blocks:
+        ssa.phis[bid] = {}
+    for var, dblocks in def_blocks.items():
+        for bid in iterated_frontier(ssa.frontier, dblocks):
+            phi = _new_value(ssa, var, 0)
+            ssa.phis[bid][var] = phi
+            ssa.phi_operands[phi] = []
+
+    # rename: walk the dominator tree, filling phi operands from the values
+    # on top of each variable's stack at the end of each predecessor
+    stacks = defaultdict(list)
+    for bid, entering in _walk(ssa.children):
+        if entering:
+            for var, phi in ssa.phis[bid].items():
+                stacks[var].append(phi)
+            for var, val in ssa.block_values[bid].items():
+                stacks[var].append(val)
+            for s in succs[bid]:
+                for var, phi in ssa.phis[s].items():
+                    ssa.phi_operands[phi].append(stacks[var][-1] if stacks[var] else None)
+        else:
+            for var in ssa.phis[bid]:
+                stacks[var].pop()
+            for var in ssa.block_values[bid]:
+                stacks[var].pop()
+    return ssa
+
+
+def _new_value(ssa, var, bits):
+    ssa.value_var.append(var)
+    ssa.value_bits.append(bits)
+    return len(ssa.value_var) - 1
+
+
+def _walk(children):
+    """Pre/post-order events (bid, entering) over the dominator tree,
+    skipping the virtual root."""
+    stack = [(ROOT, False)]
+    while stack:
+        bid, done = stack.pop()
+        if done:
+            yield bid, False
+            continue
+        if bid is not ROOT:
+            yield bid, True
+            stack.append((bid, True))
+        for c in reversed(children.get(bid, ())):
+            stack.append((c, False))
+
+
+def phi_components(phi_operands):
+    """Strongly connected components of the phi -> operand graph (Tarjan),
+    operands' components first."""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    comps = []
+    for start in phi_operands:
+        if start in index:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(phi_operands[start]))]
+        while work:
+            node, it = work[-1]
+            for op in it:
+                if op not in phi_operands:
+                    continue
+                if op not in index:
+                    index[op] = low[op] = len(index)
+                    stack.append(op)
+                    on_stack.add(op)
+                    work.append((op, iter(phi_operands[op])))
+                    break
+                if op in on_stack:
+                    low[node] = min(low[node], index[op])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    comp = []
+                    while True:
+                        v = stack.pop()
+                        on_stack.discard(v)
+                        comp.append(v)
+                        if v == node:
+                            break
+                    comps.append(comp)
+    return comps
+
+
+def sparse_reaching_definitions(u):
+    """
+    Reaching definitions from the SSA def-use links of a unit: the definitions
+    reaching a block are the expansions of the SSA values live at its entry,
+    where a phi expands to the union of its operands. Each phi is evaluated
+    once (per strongly connected component of the phi graph); block in/out
+    vectors are then materialized in one dominator-tree walk.
+    Returns in_sets, out_sets, stats like crd.reaching_definitions_bitvector.
+    """
+    ssa = build_ssa(u)
+    expand = list(ssa.value_bits)
+    evaluations = 0
+    set_ops = 0
+    # every phi of a strongly connected component expands to the same set, so
+    # each component is evaluated once, after the components it reads from
+    for comp in phi_components(ssa.phi_operands):
+        members = set(comp)
+        bits = 0
+        for phi in comp:
+            evaluations += 1
+            for op in ssa.phi_operands[phi]:
+                if op is not None and op not in members:
+                    bits |= expand[op]
+                    set_ops += 1
+        for phi in comp:
+            expand[phi] = bits
+
+    var_bits = defaultdict(int)
+    for i, did in enumerate(u['def_ids']):
+        var_bits[u['defs'][did]['var']] |= 1 << i
+    in_sets = {}
+    out_sets = {}
+    gen, kill = u['gen'], u['kill']
+    cur = 0
+    saved = []
+    for bid, entering in _walk(ssa.children):
+        if entering:
+            saved.append(cur)
+            for var, phi in ssa.phis[bid].items():
+                cur = (cur & ~var_bits[var]) | expand[phi]
+            in_sets[bid] = cur
+            out_sets[bid] = gen.get(bid, 0) | (cur & ~kill.get(bid, 0))
+            for var, val in ssa.block_values[bid].items():
+                cur = (cur & ~var_bits[var]) | expand[val]
+            set_ops += 2 * (len(ssa.phis[bid]) + len(ssa.block_values[bid])) + 2
+        else:
+            cur = saved.pop()
+    stats = {'solver': 'sparse', 'blocks': len(in_sets), 'passes': 1, 'evaluations': evaluations,
+             'set_ops': set_ops, 'phis': len(ssa.phi_operands)}
+    return in_sets, out_sets, stats
+
+
+def write_ssa_report(outpath, units):
+    with open(outpath, 'w') as f:
+        for k, u in enumerate(units):
+            ssa = build_ssa(u)
+            if k:
+                f.write('\n')
+            crd.write_unit_banner(f, u)
+            f.write('=== Immediate dominators ===\n')
+            for bid in u['blocks']:
+                d = ssa.idom.get(bid)
+                f.write(f"{bid}: idom={d if d is not ROOT else 'entry'}\n")
+            f.write('\n=== Dominance frontiers ===\n')
+            for bid in u['blocks']:
+                f.write(f"{bid}: DF={sorted(ssa.frontier[bid], key=lambda b: int(b[1:]))}\n")
+            f.write('\n=== Phi functions ===\n')
+            for bid in u['blocks']:
+                for var, phi in sorted(ssa.phis[bid].items()):
+                    ops = ['_' if op is None else f'v{op}' for op in ssa.phi_operands[phi]]
+                    f.write(f"{bid}: v{phi} = phi({var}: {', '.join(ops)})\n")
+    print(f'Wrote SSA report to {outpath}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dominators, dominance frontiers and SSA for the per-function CFGs')
+    parser.add_argument('cfile', help='Path to a single .c file')
+    parser.add_argument('--check', action='store_true',
+                        help='Verify that sparse (SSA) and dense reaching definitions agree')
+    args = parser.parse_args()
+    with open(args.cfile, 'r') as f:
+        lines = crd.preprocess(f.read())
+    units = crd.prepare_units(lines)
+    base = os.path.splitext(os.path.basename(args.cfile))[0]
+    write_ssa_report(base + '_ssa.txt', units)
+    if args.check:
+        mismatches = 0
+        for u in units:
+            dense_in, dense_out, _, _ = crd.reaching_definitions_bitvector(
+                u['blocks'], u['edges'], u['gen'], u['kill'], history_mode='none', adjacency=u['adjacency'])
+            sparse_in, sparse_out, _ = sparse_reaching_definitions(u)
+            if dense_in != sparse_in or dense_out != sparse_out:
+                mismatches += 1
+                print(f"mismatch in {u['name']}")
+        print('sparse == dense' if not mismatches else f'{mismatches} units differ')
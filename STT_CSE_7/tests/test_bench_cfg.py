@@ -0,0 +1,42 @@
+import bench_cfg
+import cfg_reaching_definitions as crd
+
+
+def test_generated_programs_are_deterministic_and_parse():
+    for shape in bench_cfg.SHAPES:
+        code = bench_cfg.generate_c(shape, 30, seed=7)
+        assert code == bench_cfg.generate_c(shape, 30, seed=7)
+        assert code.count('{') == code.count('}'), shape
+        units = crd.build_units(crd.preprocess(code))
+        assert [u['name'] for u in units if u['name'] != crd.GLOBAL_UNIT] == ['main'], shape
+
+
+def test_sizes_scale_the_program():
+    for shape in bench_cfg.SHAPES:
+        _, _, small = bench_cfg.bench_source(bench_cfg.generate_c(shape, 10), repeat=1)
+        _, _, large = bench_cfg.bench_source(bench_cfg.generate_c(shape, 40), repeat=1)
+        assert large['lines'] > small['lines'] and large['definitions'] > small['definitions'], shape
+
+
+def test_phase_runner_times_every_phase():
+    code = bench_cfg.generate_c('nested_loops', 20)
+    times, peaks, counts = bench_cfg.bench_source(code, repeat=2)
+    assert list(times) == list(peaks) == ['preprocess', 'split_units', 'leaders', 'blocks', 'edges',
+                                          'definitions', 'gen_kill', 'solve', 'solve_sparse']
+    assert counts['blocks'] > 1 and counts['evaluations'] >= counts['blocks']
+    # the phases run the same per-unit pipeline as the analyzer
+    units = crd.prepare_units(crd.preprocess(code))
+    assert counts['units'] == len(units) == 2
+    assert counts['definitions'] == sum(len(u['defs']) for u in units)
+
+
+def test_compare_runs_flags_only_real_regressions():
+    def run(**times):
+        return [{'shape': 'straight', 'size': 100, 'time': times}]
+
+    base = run(preprocess=0.010, solve=0.010, edges=0.0001)
+    new = run(preprocess=0.011, solve=0.020, edges=0.0009)
+    rows = bench_cfg.compare_runs(base, new, threshold=0.25)
+    # edges is nine times slower but below a millisecond: timer noise
+    assert [(r['phase'], r['ratio']) for r in rows] == [('solve', 2.0)]
+    assert bench_cfg.compare_runs(base, run(solve=0.020), threshold=1.5) == []
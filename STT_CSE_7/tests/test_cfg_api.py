@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+import cfg_api
+import cfg_reaching_definitions as crd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_definition_lookup_by_id():
+    code = ('int g = 1;\n'
+            'int f(int x) {\n'
+            '    int y = x;\n'
+            '    y = y + g;\n'
+            '    return y;\n'
+            '}\n'
+            'int h(void) {\n'
+            '    int z = 2;\n'
+            '    return z;\n'
+            '}\n')
+    result = cfg_api.analyze_source(code)
+    defs = [d for fn in result.functions for d in fn.defs]
+    assert len({d.id for d in defs}) == len(defs) >= 4
+    for d in defs:
+        assert result.definition(d.id) is d
+    assert result.definition(max(d.id for d in defs) + 1) is None
+
+
+def test_block_at_matches_a_linear_scan():
+    with open(os.path.join(HERE, os.pardir, 'prog2.c')) as f:
+        result = cfg_api.analyze_source(f.read())
+    for line in range(len(result.lines)):
+        expected = None
+        for fn in result.functions:
+            if fn.name != crd.GLOBAL_UNIT and fn.start <= line <= fn.end:
+                break
+        else:
+            fn = result.function(crd.GLOBAL_UNIT)
+        for block in fn.blocks:
+            if block.start <= line <= block.end:
+                expected = (fn, block)
+        hit = result.block_at(line)
+        if expected is None:
+            assert hit is None, line
+        else:
+            assert hit[0] is expected[0] and hit[1] is expected[1], line
+
+
+def test_parse_query_accepts_only_line_colon_var():
+    assert cfg_api.parse_query(' 40 : count\n') == (40, 'count')
+    for bad in ('40', 'count:40', '40:', '-1:x', '40:a b'):
+        with pytest.raises(ValueError, match='expected LINE:VAR'):
+            cfg_api.parse_query(bad)
+
+
+def test_assignments_inside_literals_are_not_definitions():
+    code = ('int f(int n) {\n'
+            '    printf("\\n== n = %d ==\\n", n);\n'
+            '    char c = \'=\';\n'
+            '    n = n + 1;\n'
+            '    return n;\n'
+            '}\n')
+    result = cfg_api.analyze_source(code)
+    fn = result.functions[-1]
+    assert [(d.var, result.lines[d.line].strip()) for d in fn.defs] == [('c', "char c = '=';"),
+                                                                         ('n', 'n = n + 1;')]
+    # the chains agree: the printf line uses n, defined by nothing in f
+    chains = cfg_api.build_chains(result)
+    assert cfg_api.answer_queries(result, chains, [(1, 'n')])[0]['defs'] == []
@@ -0,0 +1,104 @@
+import os
+
+import cfg_api
+import cfg_batch
+import cfg_cache
+import cfg_reaching_definitions as crd
+
+F = ('int f(int x) {\n'
+     '    int y = x;\n'
+     '    while (y > 0) {\n'
+     '        y = y - 1;\n'
+     '    }\n'
+     '    return y;\n'
+     '}\n')
+G = ('int g(int a) {\n'
+     '    int b = a;\n'
+     '    if (b) {\n'
+     '        b = 2;\n'
+     '    }\n'
+     '    return b;\n'
+     '}\n')
+SRC = 'int limit = 3;\n' + F + G
+
+
+def solution(result):
+    return [(fn.name, fn.start, fn.end, [(b.id, b.start, b.end, list(b.lines)) for b in fn.blocks],
+             fn.edges, fn.defs, fn.in_sets, fn.out_sets) for fn in result.functions]
+
+
+def cached(result):
+    return {fn.name: fn.cached for fn in result.functions}
+
+
+def test_unchanged_and_moved_functions_are_reused(tmp_path):
+    cache = cfg_cache.AnalysisCache(str(tmp_path))
+    first = cfg_api.analyze_source(F + G, cache=cache)
+    assert not any(cached(first).values())
+    again = cfg_api.analyze_source(F + G, cache=cache)
+    assert all(cached(again).values())
+    assert solution(again) == solution(first)
+    # g moves down and gets new block/definition IDs, but is still a hit
+    moved = cfg_api.analyze_source('int pad;\n\n' + G + F, cache=cache)
+    assert cached(moved) == {crd.GLOBAL_UNIT: False, 'g': True, 'f': True}
+    assert solution(moved) == solution(cfg_api.analyze_source('int pad;\n\n' + G + F))
+
+
+def test_changed_function_is_recomputed(tmp_path):
+    cache = cfg_cache.AnalysisCache(str(tmp_path))
+    cfg_api.analyze_source(SRC, cache=cache)
+    edited = SRC.replace('b = 2;', 'b = a + 2;')
+    result = cfg_api.analyze_source(edited, cache=cache)
+    assert cached(result) == {crd.GLOBAL_UNIT: True, 'f': True, 'g': False}
+    assert solution(result) == solution(cfg_api.analyze_source(edited))
+
+
+def test_report_keeps_iterations_with_a_warm_cache(tmp_path):
+    cache = cfg_cache.AnalysisCache(str(tmp_path / 'cache'))
+    (tmp_path / 'src.c').write_text(SRC)
+
+    def report(history):
+        base = str(tmp_path / 'src')
+        summary = cfg_batch.analyze_c_file(str(tmp_path / 'src.c'), history=history, out_base=base,
+                                           verbose=False, cache=cache)
+        return summary['cached'], (tmp_path / 'src_reaching.txt').read_text()
+
+    cold, full = report('full')
+    assert cold == 0 and 'Iteration' in full
+    # the report needs the per-pass snapshots: cached results are not used
+    assert report('full') == (0, full)
+    cached_count, text = report('none')
+    assert cached_count == 3 and 'cached result' in text
+
+
+def test_tool_version_invalidates_entries(tmp_path, monkeypatch):
+    cache = cfg_cache.AnalysisCache(str(tmp_path))
+    cfg_api.analyze_source(F, cache=cache)
+    monkeypatch.setattr(crd, 'TOOL_VERSION', crd.TOOL_VERSION + '-next')
+    assert not any(cached(cfg_api.analyze_source(F, cache=cache)).values())
+    assert all(cached(cfg_api.analyze_source(F, cache=cache)).values())
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = cfg_cache.AnalysisCache(str(tmp_path))
+    cfg_api.analyze_source(F, cache=cache)
+    for name in os.listdir(tmp_path):
+        (tmp_path / name).write_text('{"version":')
+    assert not any(cached(cfg_api.analyze_source(F, cache=cache)).values())
+
+
+def test_evict_drops_least_recently_used_entries(tmp_path):
+    cache = cfg_cache.AnalysisCache(str(tmp_path), max_bytes=None)
+    cfg_api.analyze_source(SRC, cache=cache)
+    units = crd.build_units(crd.preprocess(SRC))
+    paths = {u['name']: tmp_path / (cfg_cache.unit_cache_key(u) + '.json') for u in units}
+    for age, name in enumerate([crd.GLOBAL_UNIT, 'g', 'f']):
+        os.utime(paths[name], (1000 - age * 100, 1000 - age * 100))
+    # a load marks the entry as recently used
+    assert cache.load(next(u for u in units if u['name'] == 'f')) is not None
+    cache.max_bytes = paths['f'].stat().st_size + paths[crd.GLOBAL_UNIT].stat().st_size
+    cache.evict()
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([paths['f'].name, paths[crd.GLOBAL_UNIT].name])
+    cache.max_bytes = 0
+    cache.evict()
+    assert list(tmp_path.iterdir()) == []
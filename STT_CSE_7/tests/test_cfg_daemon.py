@@ -0,0 +1,94 @@
+import json
+import socket
+import threading
+
+import pytest
+
+import cfg_api
+import cfg_client
+import cfg_daemon
+
+SMALL = 'int f(int x) {\n    int y = x;\n    return y;\n}\n'
+
+
+def test_slow_analysis_does_not_block_other_files(tmp_path, monkeypatch):
+    big, small = tmp_path / 'big.c', tmp_path / 'small.c'
+    big.write_text(SMALL)
+    small.write_text(SMALL)
+    started, release = threading.Event(), threading.Event()
+    analyze = cfg_api.analyze_file
+
+    def slow_analyze(path, **kw):
+        if path.endswith('big.c'):
+            started.set()
+            release.wait(10)
+        return analyze(path, **kw)
+
+    monkeypatch.setattr(cfg_api, 'analyze_file', slow_analyze)
+    ws = cfg_daemon.Workspace()
+    worker = threading.Thread(target=ws.get, args=(str(big),))
+    worker.start()
+    assert started.wait(10)
+    try:
+        # while big.c is being analyzed, other requests are served
+        responses = []
+        requests = [{'op': 'ping'}, {'op': 'open', 'file': str(small)}, {'op': 'files'}]
+        client = threading.Thread(target=lambda: responses.extend(
+            cfg_daemon.handle(ws, json.dumps(req)) for req in requests))
+        client.start()
+        client.join(5)
+        assert not client.is_alive()
+        assert all(resp['ok'] for resp in responses)
+        assert responses[1]['result']['functions'] == 1
+        assert [s['file'] for s in responses[2]['result']] == [str(small)]
+    finally:
+        release.set()
+        worker.join()
+    assert len(ws.entries()) == 2
+
+
+def test_changed_file_is_reanalyzed(tmp_path):
+    src = tmp_path / 'a.c'
+    src.write_text(SMALL)
+    ws = cfg_daemon.Workspace()
+    first = ws.get(str(src))
+    assert ws.get(str(src)) is first
+    src.write_text(SMALL + 'int g(void) {\n    return 1;\n}\n')
+    assert ws.refresh() == [str(src)]
+    assert len(ws.get(str(src))['result'].functions) == 2
+
+
+def test_unreadable_change_keeps_the_previous_entry(tmp_path):
+    src = tmp_path / 'a.c'
+    src.write_text(SMALL)
+    ws = cfg_daemon.Workspace()
+    first = ws.get(str(src))
+    src.write_bytes(b'int f(void) { return 0; } /* \xff\xfe */\n')
+    errors = []
+    assert ws.refresh(on_error=lambda path, e: errors.append((path, type(e)))) == []
+    assert errors == [(str(src), UnicodeDecodeError)]
+    assert ws.entries() == [(str(src), first)]
+    # reported once per change, not on every poll
+    assert ws.refresh(on_error=lambda path, e: errors.append(path)) == [] and len(errors) == 1
+    src.write_text(SMALL)
+    assert ws.refresh() == [str(src)]
+    assert ws.close(str(src))
+    assert ws.files == ws.file_locks == ws.failed == {}
+
+
+def test_client_reports_a_missing_reply(tmp_path):
+    sock_path = str(tmp_path / 'd.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(sock_path)
+        server.listen()
+
+        def hang_up():
+            conn, _ = server.accept()
+            conn.recv(65536)
+            conn.close()
+
+        t = threading.Thread(target=hang_up)
+        t.start()
+        with pytest.raises(cfg_client.NoReply, match='without a reply'):
+            cfg_client.request({'op': 'ping'}, sock_path, timeout=5)
+        t.join()
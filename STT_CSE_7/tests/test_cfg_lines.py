@@ -0,0 +1,42 @@
+import cfg_api
+import cfg_reaching_definitions as crd
+
+
+def test_preprocess_splits_on_newlines_only():
+    # a GNU-style page break (^L) must not start a new line
+    code = 'int a;\f\nint b = a;\n\fint c = b;\n'
+    assert crd.preprocess(code) == ['int a;', 'int b = a;', '\fint c = b;']
+    assert crd.source_line_map(code) == [0, 1, 2, 3]
+
+
+def test_source_line_map_with_form_feed_and_block_comments():
+    code = ('int a;\f\n'
+            '/* two\n'
+            '   lines */ int b = a;\n'
+            'int c = b; /* x */ int d = c;\v\n'
+            '/* a */ /* b\n'
+            '*/ int e = d;\n'
+            'int f = e;\n')
+    lines = crd.preprocess(code)
+    pre = crd.source_line_map(code)
+    assert len(pre) == code.count('\n') + 1
+    for i, src in enumerate(code.split('\n')):
+        for var in 'abcdef':
+            decl = f'int {var}'
+            if decl in src:
+                assert decl in lines[pre[i]], (i, src, lines[pre[i]])
+
+
+def test_findings_after_page_break_land_in_the_right_block():
+    code = ('int f(int x) {\n'
+            '    int y = x;\f\n'
+            '    if (y > 0) {\n'
+            '        y = y - 1;\n'
+            '    }\n'
+            '    return y;\n'
+            '}\n')
+    result = cfg_api.analyze_source(code)
+    pre = crd.source_line_map(code)
+    fn, block = result.block_at(pre[3])      # source line 4: y = y - 1;
+    assert result.lines[pre[3]].strip() == 'y = y - 1;'
+    assert pre[3] in block.lines
@@ -0,0 +1,49 @@
+import os
+import re
+import sys
+
+import bench_cfg
+import cfg_reaching_definitions as crd
+import cfg_render
+
+# writes a partial image, then fails unless DOT_OK is set
+FAKE_DOT = '''
+import os, sys
+out = sys.argv[sys.argv.index("-o") + 1]
+with open(out, "w") as f:
+    f.write("partial")
+sys.exit(0 if os.environ.get("DOT_OK") else 1)
+'''
+
+
+def test_collapsed_units_respect_the_node_cap():
+    units = crd.prepare_units(crd.preprocess(bench_cfg.generate_c('loop_redefs', 100)))
+    assert units[-1]['metrics'][0] > 200
+    for cap in (1, 5, 20):
+        text = cfg_render.dot_text_units(units[-1:], collapse_over=cap)
+        nodes = re.findall(r'^\s+(\w+) \[label=', text, re.M)
+        edges = re.findall(r'^\s+(\w+) -> (\w+)', text, re.M)
+        assert len(nodes) == cap and sum(n.endswith('_rest') for n in nodes) == 1
+        assert {n for e in edges for n in e} <= set(nodes)
+    # at the cap, every chain keeps its own node
+    groups, _ = cfg_render.collapse_chains(units[-1]['blocks'], units[-1]['edges'])
+    assert len(groups) < units[-1]['metrics'][0]
+    text = cfg_render.dot_text_units(units[-1:], collapse_over=len(groups))
+    assert len(re.findall(r'^\s+(\w+) \[label=', text, re.M)) == len(groups) and '_rest' not in text
+
+
+def test_failed_render_leaves_no_image(tmp_path, monkeypatch):
+    fake = tmp_path / 'bin' / 'dot'
+    fake.parent.mkdir()
+    fake.write_text(f'#!{sys.executable}\n{FAKE_DOT}')
+    fake.chmod(0o755)
+    monkeypatch.setenv('PATH', str(fake.parent) + os.pathsep + os.environ['PATH'])
+    dot, img = tmp_path / 'a_cfg.dot', tmp_path / 'a_cfg.png'
+    dot.write_text('digraph CFG {}\n')
+    assert cfg_render.render_many([(str(dot), str(img))], verbose=False)['failed'] == 1
+    # neither the partial image nor the temporary file is left behind
+    assert sorted(os.listdir(tmp_path)) == ['a_cfg.dot', 'bin']
+    monkeypatch.setenv('DOT_OK', '1')
+    assert cfg_render.render_many([(str(dot), str(img))], verbose=False)['rendered'] == 1
+    assert sorted(os.listdir(tmp_path)) == ['a_cfg.dot', 'a_cfg.png', 'bin']
+    assert cfg_render.render_many([(str(dot), str(img))], verbose=False)['skipped'] == 1
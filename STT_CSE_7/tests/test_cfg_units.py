@@ -0,0 +1,35 @@
+import cfg_reaching_definitions as crd
+
+CODE = ('struct node { int v; struct node *next; };\n'
+        'typedef struct pair { int a, b; } pair_t;\n'
+        'enum color\n'
+        '{\n'
+        '    RED,\n'
+        '    GREEN\n'
+        '};\n'
+        'struct node *make(int v) {\n'
+        '    struct node *n = 0;\n'
+        '    return n;\n'
+        '}\n'
+        'union value\n'
+        'pick(int i)\n'
+        '{\n'
+        '    union value u;\n'
+        '    return u;\n'
+        '}\n'
+        'enum color next_color(enum color c) {\n'
+        '    return c;\n'
+        '}\n')
+
+
+def test_functions_returning_structs_unions_and_enums_are_units():
+    lines = crd.preprocess(CODE)
+    funcs = crd.split_functions(lines)
+    assert [(f['name'], lines[f['start']], lines[f['end']]) for f in funcs] == [
+        ('make', 'struct node *make(int v) {', '}'),
+        ('pick', 'pick(int i)', '}'),
+        ('next_color', 'enum color next_color(enum color c) {', '}'),
+    ]
+    # the type definitions stay in the global unit
+    units = crd.build_units(lines)
+    assert [u['name'] for u in units] == [crd.GLOBAL_UNIT, 'make', 'pick', 'next_color']
@@ -0,0 +1,94 @@
+import os
+import random
+from collections import OrderedDict, defaultdict
+
+import cfg_reaching_definitions as crd
+import dataflow
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def random_unit(rng):
+    """A prepared unit (see crd.prepare_unit) with a random CFG: loops,
+    self-loops, parallel edges and unreachable blocks included."""
+    n = rng.randint(1, 12)
+    blocks = OrderedDict((f'B{k}', {'start': k, 'end': k, 'lines': []}) for k in range(n))
+    bids = list(blocks)
+    edges = []
+    for k, bid in enumerate(bids):
+        if k + 1 < n and rng.random() < 0.8:
+            edges.append((bid, bids[k + 1], 'seq'))
+        for _ in range(rng.randint(0, 2)):
+            edges.append((bid, rng.choice(bids), rng.choice(['true', 'false', 'back'])))
+    defs = OrderedDict()
+    var_map = defaultdict(list)
+    for bid in bids:
+        for _ in range(rng.randint(0, 3)):
+            did = f'D{len(defs) + 1}'
+            var = rng.choice('abcd')
+            defs[did] = {'var': var, 'block': bid, 'line_idx': blocks[bid]['start'], 'text': f'{var} = 0;'}
+            var_map[var].append(did)
+    def_ids, bit_of = crd.index_definitions(defs)
+    gen, kill = crd.compute_gen_kill_bits(blocks, defs, var_map, bit_of)
+    return {'name': 'f', 'blocks': blocks, 'edges': edges, 'adjacency': crd.build_adjacency(blocks, edges),
+            'defs': defs, 'var_map': var_map, 'def_ids': def_ids, 'gen': gen, 'kill': kill}
+
+
+def dense(u):
+    in_sets, out_sets, _, _ = crd.reaching_definitions_bitvector(
+        u['blocks'], u['edges'], u['gen'], u['kill'], history_mode='none', adjacency=u['adjacency'])
+    return in_sets, out_sets
+
+
+def sample_units():
+    for name in ('prog1.c', 'prog2.c', 'prog3.c'):
+        with open(os.path.join(HERE, os.pardir, name)) as f:
+            yield from crd.prepare_units(crd.preprocess(f.read()))
+
+
+def framework_reaching(u):
+    res = dataflow.solve(dataflow.cfg_view(u), [dataflow.reaching_definitions(u)])['reaching']
+    return res['in'], res['out']
+
+
+def test_framework_reaching_matches_dense_on_random_cfgs():
+    rng = random.Random(13)
+    for case in range(300):
+        u = random_unit(rng)
+        assert framework_reaching(u) == dense(u), case
+
+
+def test_framework_reaching_matches_dense_on_the_sample_programs():
+    for u in sample_units():
+        assert framework_reaching(u) == dense(u), u['name']
+
+
+def test_shared_traversal_matches_separate_solves():
+    names = list(dataflow.ANALYSES)
+    for u, analyses, together in dataflow.analyze_units(sample_units(), names):
+        view = dataflow.cfg_view(u)
+        for a in analyses:
+            alone = dataflow.solve(view, [a])[a.name]
+            assert (together[a.name]['in'], together[a.name]['out']) == (alone['in'], alone['out']), \
+                (u['name'], a.name)
+
+
+def test_available_expressions_meet_is_intersection():
+    code = ('int f(int a, int b, int c) {\n'
+            '    int x = a + b;\n'
+            '    if (c) {\n'
+            '        a = 1;\n'
+            '    }\n'
+            '    int y = a + b;\n'
+            '    int z = b * c;\n'
+            '    return x + y + z;\n'
+            '}\n')
+    u = next(u for u in crd.prepare_units(crd.preprocess(code)) if u['name'] == 'f')
+    a = dataflow.available_expressions(u)
+    res = dataflow.solve(dataflow.cfg_view(u), [a])['available']
+    join = next(bid for bid, info in u['blocks'].items()
+                if any('int y = a + b;' in ln for _, ln in info['lines']))
+    assert 'a + b' in a.universe
+    # a + b is killed on the branch that assigns a, so it is not available at the join
+    assert dataflow.labels(res['in'][join], a.universe) == []
+    assert 'b * c' in dataflow.labels(res['out'][join], a.universe)
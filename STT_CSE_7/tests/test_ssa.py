@@ -0,0 +1,25 @@
+import os
+import random
+
+import cfg_reaching_definitions as crd
+import ssa
+from test_dataflow import dense, random_unit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_sparse_matches_dense_on_random_cfgs():
+    rng = random.Random(14)
+    for case in range(300):
+        u = random_unit(rng)
+        sparse_in, sparse_out, _ = ssa.sparse_reaching_definitions(u)
+        assert (sparse_in, sparse_out) == dense(u), case
+
+
+def test_sparse_matches_dense_on_the_sample_programs():
+    for name in ('prog1.c', 'prog2.c', 'prog3.c'):
+        with open(os.path.join(HERE, os.pardir, name)) as f:
+            units = crd.prepare_units(crd.preprocess(f.read()))
+        for u in units:
+            sparse_in, sparse_out, _ = ssa.sparse_reaching_definitions(u)
+            assert (sparse_in, sparse_out) == dense(u), (name, u['name'])
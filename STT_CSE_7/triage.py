@@ -0,0 +1,197 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cfg_api
+import cfg_cache
+import cfg_reaching_definitions as crd
+
+# the scanner output readers live with the scanning notebook (STT_CSE_6)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'STT_CSE_6'))
+from findings import OUTPUT_EXTENSIONS, READERS  # noqa: E402
+
+
+# ----------------- Triage -----------------
+# Scanner findings (cppcheck / flawfinder / semgrep outputs, see
+# STT_CSE_6/findings.py) are grouped by source file. Each file is analyzed
+# once, and every finding in it is annotated with:
+#   function, block     the CFG block containing the flagged line
+#   reachable           whether that block is reachable from the function's
+#                       entry block (None at file scope); conservative, as the
+#                       CFG keeps a fall-through edge after return/break/goto
+#   reaching            for each variable used on the line, the definitions
+#                       that reach it
+# Findings use 1-based source lines; the analysis uses 0-based preprocessed
+# lines (block comments removed), so lines are mapped with source_line_map
+# and reported back as source lines.
+
+CSV_FIELDS = ['tool', 'file', 'line', 'rule', 'cwes', 'status', 'function', 'block', 'reachable',
+              'reaching', 'message']
+
+
+def tool_of(path):
+    """Tool that writes findings files with this extension (cppcheck .xml, ...)."""
+    ext = os.path.splitext(path)[1].lower()
+    for tool, tool_ext in OUTPUT_EXTENSIONS.items():
+        if ext == tool_ext:
+            return tool
+    raise ValueError(f'cannot tell the tool of {path}; use --tool')
+
+
+def group_findings(path, tool=None):
+    """{source file: [finding dict, ...]} of a findings file, in file order."""
+    tool = tool or tool_of(path)
+    by_file = defaultdict(list)
+    for f in READERS[tool](path, ''):
+        by_file[f.file].append({'tool': f.tool, 'file': f.file, 'line': f.line, 'rule': f.rule,
+                                'cwes': list(f.cwes), 'message': f.message})
+    return by_file
+
+
+def reachable_blocks(fn):
+    """IDs of the blocks reachable from the function's entry block."""
+    succs = defaultdict(list)
+    for src, dst, _ in fn.edges:
+        succs[src].append(dst)
+    entry = fn.blocks[0].id
+    seen = {entry}
+    stack = [entry]
+    while stack:
+        for nxt in succs[stack.pop()]:
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return seen
+
+
+def triage_file(cpath, findings, cache=None, solver='dense'):
+    """Annotate the findings of one source file (see above); analyzes it once."""
+    try:
+        with open(cpath, 'r', errors='replace') as f:
+            code = f.read()
+    except OSError as e:
+        return [dict(fd, status=f'missing: {e.strerror}') for fd in findings]
+    try:
+        result = cfg_api.analyze_source(code, path=cpath, cache=cache, solver=solver)
+        chains = cfg_api.build_chains(result)
+    except Exception as e:
+        return [dict(fd, status=f'error: {type(e).__name__}: {e}') for fd in findings]
+    pre_of = crd.source_line_map(code)
+    src_of = {}
+    for i in range(len(pre_of) - 1, -1, -1):
+        src_of[pre_of[i]] = i   # first source line of each preprocessed line
+    reachable = {}
+    out = []
+    for fd in findings:
+        ann = dict(fd, status='ok', function=None, block=None, reachable=None, reaching={})
+        out.append(ann)
+        src = fd['line'] - 1
+        if not 0 <= src < len(pre_of) or pre_of[src] >= len(result.lines):
+            ann['status'] = 'line out of range'
+            continue
+        line = pre_of[src]
+        hit = result.block_at(line)
+        if hit is None:
+            ann['status'] = 'no block'
+            continue
+        fn, block = hit
+        ann['function'] = fn.name
+        ann['block'] = f'B{block.id}'
+        if fn.name != crd.GLOBAL_UNIT:
+            if fn.name not in reachable:
+                reachable[fn.name] = reachable_blocks(fn)
+            ann['reachable'] = block.id in reachable[fn.name]
+        text = result.lines[line]
+        _, uses = crd.statement_uses(text) if not text.lstrip().startswith('#') else (None, [])
+        for var in uses:
+            defs = []
+            for did in chains.reaching(line, var):
+                d = result.definition(did)
+                defs.append({'id': f'D{did}', 'line': src_of.get(d.line, d.line) + 1,
+                             'text': result.lines[d.line].strip()})
+            ann['reaching'][var] = defs
+    return out
+
+
+def _triage_job(job):
+    # runs in a worker process; triage_file already turns per-file failures into statuses
+    cpath, findings, cache, solver = job
+    return triage_file(cpath, findings, cache, solver)
+
+
+def triage(findings_path, root='.', tool=None, jobs=None, cache=None, solver='dense', verbose=True):
+    """Annotate every finding of a findings file. Source paths in the findings
+    are relative to root. Files are analyzed in parallel, one job per file.
+    Returns the annotated findings grouped by file, in findings-file order."""
+    by_file = group_findings(findings_path, tool)
+    worker_cache = cfg_cache.AnalysisCache(cache.cache_dir, max_bytes=None) if cache is not None else None
+    job_list = [(os.path.join(root, path), fds, worker_cache, solver) for path, fds in by_file.items()]
+    results = [None] * len(job_list)
+    t0 = time.perf_counter()
+    if jobs == 1 or len(job_list) <= 1:
+        results = [_triage_job(job) for job in job_list]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_triage_job, job): k for k, job in enumerate(job_list)}
+            for done, fut in enumerate(as_completed(futures), 1):
+                results[futures[fut]] = fut.result()
+                if verbose:
+                    print(f'\r[{done}/{len(job_list)}] files triaged', end='', file=sys.stderr, flush=True)
+        if verbose:
+            print(file=sys.stderr)
+    if cache is not None:
+        cache.evict()
+    out = [ann for res in results for ann in res]
+    if verbose:
+        status = defaultdict(int)
+        for ann in out:
+            status[ann['status'].split(':')[0]] += 1
+        unreachable = sum(1 for ann in out if ann.get('reachable') is False)
+        print(f'{len(out)} findings in {len(job_list)} files triaged in {time.perf_counter() - t0:.2f} s: '
+              + ', '.join(f'{n} {s}' for s, n in sorted(status.items()))
+              + f'; {unreachable} in unreachable blocks', file=sys.stderr)
+    return out
+
+
+def format_reaching(reaching):
+    # 'var=D3@12,D7@20;other=' (definition ID @ source line)
+    return ';'.join(f"{var}=" + ','.join(f"{d['id']}@{d['line']}" for d in defs)
+                    for var, defs in reaching.items())
+
+
+def write_triage(annotated, path):
+    """Write annotated findings as CSV (if path ends in .csv) or JSON."""
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for ann in annotated:
+                writer.writerow(dict(ann, cwes=','.join(ann['cwes']),
+                                     reaching=format_reaching(ann.get('reaching', {}))))
+    else:
+        with open(path, 'w') as f:
+            json.dump(annotated, f, indent=1)
+    print(f'Wrote {len(annotated)} triaged findings to {path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Map scanner findings onto CFG blocks, reachability and reaching definitions')
+    parser.add_argument('findings', help='cppcheck .xml, flawfinder .csv or semgrep .json findings file')
+    parser.add_argument('--tool', choices=sorted(READERS), default=None,
+                        help='Findings format (default: from the file extension)')
+    parser.add_argument('--root', default='.', help='Directory the source paths in the findings are relative to')
+    parser.add_argument('--out', default='triage.json', help='Output file, .json or .csv')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--solver', choices=crd.SOLVERS, default='dense', help='Reaching-definitions solver')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the incremental cache')
+    parser.add_argument('--cache-dir', default='.cfg_cache', help='Incremental cache directory')
+    args = parser.parse_args()
+    cache = None if args.no_cache else cfg_cache.AnalysisCache(args.cache_dir)
+    annotated = triage(args.findings, args.root, args.tool, args.jobs, cache, args.solver)
+    write_triage(annotated, args.out)